@@ -0,0 +1,178 @@
+import logging
+import sys
+from typing import Iterable, Optional, TextIO
+
+from core import config
+from game.engine import GameEngine
+
+logger = logging.getLogger(__name__)
+
+PROMPT = "> "
+COMMANDS_HELP = "Commands: /status, /save, /help, /quit. Anything else is an action."
+
+
+def _print_status(engine: GameEngine, out: TextIO):
+    status = engine.get_player_status()
+    inventory = ", ".join(status.get("inventory") or []) or "empty"
+    out.write(
+        f"[{status.get('name', '-')}] HP: {status.get('health', '-')} | "
+        f"Stamina: {status.get('stamina', '-')} | Money: {status.get('money', '-')} | "
+        f"Inventory: {inventory}\n"
+    )
+    usage = engine.get_usage()["total"]
+    out.write(
+        f"Usage: {usage['calls']} calls, {usage['total_tokens']} tokens, "
+        f"~${usage['cost']:.4f}\n"
+    )
+
+
+def _write_state_changes(engine: GameEngine, out: TextIO):
+    """Writes the state changes extracted in the background for the last turn."""
+    for message in engine.apply_state_changes(wait=True):
+        out.write(message)
+
+
+def play_turn(engine: GameEngine, action: str, out: TextIO) -> str:
+    """
+    Runs one player action and writes the narrative to `out` (as it streams in, when
+    streaming is enabled). Returns the narrative. Ctrl+C cancels the turn.
+    """
+    if not config.STREAM_NARRATION:
+        narrative, _ = engine.process_player_action(action)
+        out.write(narrative.rstrip("\n") + "\n")
+        _write_state_changes(engine, out)
+        return narrative
+
+    chunks = []
+    stream = engine.stream_player_action(action)
+    try:
+        for chunk in stream:
+            chunks.append(chunk)
+            out.write(chunk)
+            out.flush()
+    except KeyboardInterrupt:
+        # Closing the stream cancels the turn and rolls the player back
+        stream.close()
+        out.write("\n>> Turn cancelled.\n")
+        return "".join(chunks)
+    out.write("\n")
+    _write_state_changes(engine, out)
+    return "".join(chunks)
+
+
+def start_game(
+    engine: GameEngine,
+    out: TextIO,
+    slot_id: Optional[str] = None,
+    new_game: bool = False,
+) -> bool:
+    """
+    Starts a new game, or loads `slot_id` (the most recent slot by default), and writes
+    the latest narrative. Returns True if the game state is ready.
+    """
+    if not new_game:
+        if engine.load_game(slot_id):
+            logger.info("Loaded game state successfully.")
+            out.write((engine.get_last_message_content() or "") + "\n")
+            return True
+        if slot_id is not None:
+            out.write(f"Could not load save slot {slot_id}.\n")
+            return False
+        logger.info("No save to continue, starting a new game.")
+
+    narrative, _ = engine.start_new_game()
+    out.write(narrative.rstrip("\n") + "\n")
+    if not engine.game_state.is_initialized():
+        logger.error("Engine state not initialized after start_new_game.")
+        return False
+    if not engine.save_game():
+        logger.warning("Failed to save initial game state.")
+    return True
+
+
+def run_repl(engine: GameEngine, inp: TextIO = sys.stdin, out: TextIO = sys.stdout):
+    """Interactive stdin/stdout loop: one action per line until /quit or EOF."""
+    out.write(COMMANDS_HELP + "\n")
+    while True:
+        out.write(PROMPT)
+        out.flush()
+        try:
+            line = inp.readline()
+        except KeyboardInterrupt:
+            out.write("\n")
+            break
+        if not line:  # EOF
+            out.write("\n")
+            break
+
+        action = line.strip()
+        if not action:
+            continue
+        if action in ("/quit", "/exit"):
+            break
+        elif action == "/help":
+            out.write(COMMANDS_HELP + "\n")
+        elif action == "/status":
+            _print_status(engine, out)
+        elif action == "/save":
+            out.write("Game saved.\n" if engine.save_game() else "Save failed.\n")
+        else:
+            logger.info(f"Player action received: '{action}'")
+            play_turn(engine, action, out)
+
+    if not engine.save_game():
+        logger.warning("Final save failed before quitting.")
+
+
+def run_script(
+    engine: GameEngine,
+    actions: Iterable[str],
+    out: TextIO = sys.stdout,
+    echo: bool = True,
+) -> int:
+    """
+    Plays a scripted list of actions, one per line; blank lines and lines starting
+    with '#' are skipped. Returns the number of turns played.
+    """
+    turns = 0
+    for line in actions:
+        action = line.strip()
+        if not action or action.startswith("#"):
+            continue
+        if echo:
+            out.write(f"{PROMPT}{action}\n")
+        play_turn(engine, action, out)
+        turns += 1
+
+    if not engine.save_game():
+        logger.warning("Failed to save game state after script.")
+    logger.info(f"Script finished after {turns} turns.")
+    return turns
+
+
+def run_headless(
+    engine: GameEngine,
+    script: Optional[str] = None,
+    slot_id: Optional[str] = None,
+    new_game: bool = False,
+) -> int:
+    """
+    Entry point for running without a display: plays `script` (a path, or "-" for
+    stdin) if given, otherwise starts the REPL. Returns a process exit code.
+    """
+    if not start_game(engine, sys.stdout, slot_id=slot_id, new_game=new_game):
+        return 1
+
+    if script is None:
+        run_repl(engine)
+    elif script == "-":
+        run_script(engine, sys.stdin)
+    else:
+        try:
+            with open(script, "r", encoding="utf-8") as f:
+                run_script(engine, f)
+        except OSError as e:
+            logger.error(f"Error reading script {script}: {e}")
+            print(f"Could not read script {script}: {e}", file=sys.stderr)
+            return 1
+    return 0
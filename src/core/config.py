@@ -11,15 +11,42 @@ load_dotenv()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 SAVE_DIR = os.path.join(BASE_DIR, "saves")
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-SAVE_FILE_PATH = os.getenv("SAVE_FILE_PATH", os.path.join(SAVE_DIR, "save.json"))
+# "journal": snapshot + append-only delta journal (cheap per-turn saves); "json": full rewrite.
+SAVE_FORMAT = os.getenv("SAVE_FORMAT", "journal")
+JOURNAL_COMPACT_EVERY = 50  # Journal entries before the snapshot is rewritten
+# Snapshot encoding: "json" (readable) or "gzip" (compact, interned strings). Loading auto-detects.
+SAVE_ENCODING = os.getenv("SAVE_ENCODING", "json")
+AUTOSAVE = os.getenv("AUTOSAVE", "1") == "1"  # Save in the background after every turn
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # DEBUG also logs request messages
+LOG_BACKUP_COUNT = 5  # Logs of previous runs kept as latest.log.1, .2, ...
+# Per-turn tracing spans (turn, tool loop, HTTP, tools, saves), off by default.
+TRACING = os.getenv("TRACING", "0") == "1"
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(LOG_DIR, "traces.jsonl"))
+TRACE_FORMAT = os.getenv("TRACE_FORMAT", "jsonl")  # "jsonl" or "otlp" (OTLP/JSON lines)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Point at a local stand-in (e.g. devtools.mock_openrouter) for offline runs.
+OPENROUTER_API_URL = os.getenv(
+    "OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions"
+)
+
+# HTTP transport settings for OpenRouter calls (seconds / counts).
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "4"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
 
 NARRATION_MODEL = "google/gemini-2.0-flash-001"
 SUMMARIZATION_MODEL = "google/gemini-2.0-flash-001"
 TOOL_MODEL = "google/gemini-2.0-flash-001"
+# USD per million (prompt, completion) tokens, used to estimate cost when a
+# response doesn't report it. Unlisted models are counted as free.
+MODEL_PRICES = {
+    "google/gemini-2.0-flash-001": (0.10, 0.40),
+}
 
 STORY = (
     "The Eidolon is a colossal spaceship-megacity that has drifted through deep space for generations. "
@@ -60,6 +87,35 @@ STORY = (
 )
 
 MAX_TOOL_ITERATIONS = 5
+# Turns kept in the scrollback transcript; older turns are trimmed from the view.
+TRANSCRIPT_MAX_TURNS = int(os.getenv("TRANSCRIPT_MAX_TURNS", "100"))
+# Stream narration token-by-token (SSE) instead of waiting for the full completion.
+STREAM_NARRATION = os.getenv("STREAM_NARRATION", "1") == "1"
+# Summarize old messages in the background after a turn instead of inline before narration.
+BACKGROUND_SUMMARIZATION = os.getenv("BACKGROUND_SUMMARIZATION", "1") == "1"
+# Have the narrator return state changes as a JSON block after the narrative, applied
+# locally, instead of tool calls that each cost another round trip. Tool calls the
+# model still makes are handled by the regular tool loop.
+STRUCTURED_TURNS = os.getenv("STRUCTURED_TURNS", "0") == "1"
+# Narrate without tools and let TOOL_MODEL extract the turn's state changes from the
+# action and narrative in the background, off the turn's critical path.
+SPLIT_TOOL_PIPELINE = os.getenv("SPLIT_TOOL_PIPELINE", "0") == "1"
+
+# Prompt token budgets per model (estimated tokens). Old messages are summarized once the
+# prompt passes CONTEXT_SUMMARIZE_AT of the budget, down to CONTEXT_SUMMARIZE_TO.
+DEFAULT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+CONTEXT_TOKEN_BUDGETS = {
+    NARRATION_MODEL: DEFAULT_CONTEXT_TOKEN_BUDGET,
+}
+CONTEXT_SUMMARIZE_AT = 0.75
+CONTEXT_SUMMARIZE_TO = 0.5
+CONTEXT_KEEP_RECENT_MESSAGES = 6  # Newest conversation messages never summarized
+CONTEXT_MAX_SUMMARIES = 4  # Older summaries get merged beyond this count
+
+# Send a stable prefix (prompt + summaries + history) with volatile content at the tail,
+# so provider prompt caches can hit. PROMPT_CACHE_CONTROL adds explicit cache_control markers.
+PREFIX_STABLE_MESSAGES = os.getenv("PREFIX_STABLE_MESSAGES", "1") == "1"
+PROMPT_CACHE_CONTROL = os.getenv("PROMPT_CACHE_CONTROL", "0") == "1"
 DEBUG_PASSWORD = "QWE987"  # Story cheat code, use for debugging.
 
 STARTING_PROMPT = (
@@ -89,6 +145,13 @@ REMINDER_MESSAGE = (
     # "Then Michael raised his eyebrow, - \033[94mYou guys already know each other?\033[0m"
 )
 
+# Replaces REMINDER_MESSAGE when the narrator has no tools (SPLIT_TOOL_PIPELINE).
+NARRATION_REMINDER_MESSAGE = (
+    "REMINDER: "
+    "Just focus on telling the story for the user. "
+    "Your responses must be no more than 5 sentences."
+)
+
 if not OPENROUTER_API_KEY:
     logger.warning(
         "OPENROUTER_API_KEY not found in environment or .env file. AI Narrator will be unavailable."
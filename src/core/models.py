@@ -1,71 +1,278 @@
+from dataclasses import dataclass, field
+
+# Version of the serialized Character format. Bump it when the format changes and
+# add a migration from the previous version to _MIGRATIONS.
+SCHEMA_VERSION = 2
+
+
+@dataclass(slots=True, eq=False)
 class Item:
-    """Represents an item in the game."""
+    """Represents an item (or a stack of identical items) in the game."""
+
+    name: str
+    description: str
+    value: int = 0
+    properties: dict = field(default_factory=dict)
+    quantity: int = 1
+
+    def __post_init__(self):
+        if self.properties is None:
+            self.properties = {}
+
+    @property
+    def display_name(self) -> str:
+        """The name, with the count for stacks of more than one."""
+        return f"{self.name} x{self.quantity}" if self.quantity != 1 else self.name
+
+    def to_dict(self) -> dict:
+        data = {
+            "name": self.name,
+            "description": self.description,
+            "value": self.value,
+            # Only non-empty properties are copied, so the dict never aliases the item
+            "properties": dict(self.properties) if self.properties else {},
+        }
+        # Single items serialize exactly as before stacks existed
+        if self.quantity != 1:
+            data["quantity"] = self.quantity
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        """Builds an item from its dict without modifying or copying the dict."""
+        properties = data.get("properties")
+        return cls(
+            data["name"],
+            data.get("description", ""),
+            data.get("value", 0),
+            dict(properties) if properties else {},
+            data.get("quantity", 1),
+        )
+
+
+class Inventory:
+    """
+    A character's items, indexed by case-folded name.
+
+    Identical items (same name ignoring case, description, value and properties)
+    share one stack counted by its `quantity`. Items that only share a name stay
+    separate stacks, so no item's fields are lost. Lookup, stacking and removal by
+    name go through the name index instead of scanning the list. Iteration yields
+    one Item per stack, in the order the stacks were first added. Serializes to the
+    same list of item dicts as the plain list it replaces; repeated items in older
+    saves load as stacks.
+
+    Items are indexed by the name they had when added, so rename an item by
+    removing it and adding it again.
+    """
+
+    __slots__ = ("_stacks", "_index", "_next_id")
+
+    def __init__(self, items=None):
+        self._stacks = {}  # stack id -> Item, in insertion order
+        self._index = {}  # case-folded name -> ids of the stacks with that name
+        self._next_id = 0
+        for item in items or ():
+            self.add(item)
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return name.casefold()
+
+    @staticmethod
+    def _same_item(stack: Item, item: Item) -> bool:
+        return (
+            stack.description == item.description
+            and stack.value == item.value
+            and stack.properties == item.properties
+        )
+
+    def add(self, item: Item) -> Item:
+        """
+        Adds an item, stacking it onto an identical held item if there is one.
+        Returns the stack.
+        """
+        ids = self._index.setdefault(self._key(item.name), [])
+        for stack_id in ids:
+            stack = self._stacks[stack_id]
+            if self._same_item(stack, item):
+                stack.quantity += item.quantity
+                return stack
+        ids.append(self._next_id)
+        self._stacks[self._next_id] = item
+        self._next_id += 1
+        return item
+
+    append = add  # For code written against the plain inventory list
+
+    def get(self, name: str):
+        """Returns the first held stack with this name (ignoring case), or None."""
+        ids = self._index.get(self._key(name))
+        return self._stacks[ids[0]] if ids else None
 
-    def __init__(
-        self, name: str, description: str, value: int = 0, properties: dict = None
-    ):
-        self.name = name
-        self.description = description
-        self.value = value
-        self.properties = properties if properties is not None else {}
+    def remove(self, name: str, quantity: int = None):
+        """
+        Removes `quantity` of the named item, taken from its stacks oldest first, or
+        every stack with that name if quantity is None. Returns the first affected
+        stack, or None if no such item is held.
+        """
+        key = self._key(name)
+        ids = self._index.get(key)
+        if not ids:
+            return None
+        first = self._stacks[ids[0]]
+        while ids and (quantity is None or quantity > 0):
+            stack = self._stacks[ids[0]]
+            if quantity is None or quantity >= stack.quantity:
+                if quantity is not None:
+                    quantity -= stack.quantity
+                del self._stacks[ids.pop(0)]
+            else:
+                stack.quantity -= quantity
+                quantity = 0
+        if not ids:
+            del self._index[key]
+        return first
 
-    def to_dict(self):
-        return self.__dict__
+    def clear(self):
+        self._stacks.clear()
+        self._index.clear()
+
+    def copy(self) -> "Inventory":
+        """Returns a shallow copy (the items are shared)."""
+        inventory = Inventory()
+        inventory._stacks = dict(self._stacks)
+        inventory._index = {key: list(ids) for key, ids in self._index.items()}
+        inventory._next_id = self._next_id
+        return inventory
+
+    def names(self) -> list:
+        """Returns the display names of the held items, in order."""
+        return [item.display_name for item in self._stacks.values()]
+
+    def __contains__(self, name) -> bool:
+        if isinstance(name, Item):
+            name = name.name
+        return self._key(name) in self._index
+
+    def __iter__(self):
+        return iter(self._stacks.values())
+
+    def __len__(self) -> int:
+        return len(self._stacks)
+
+    def __repr__(self) -> str:
+        return f"Inventory({list(self._stacks.values())!r})"
+
+    def to_list(self) -> list:
+        return [item.to_dict() for item in self._stacks.values()]
 
     @classmethod
-    def from_dict(cls, data):
-        return cls(**data)
+    def from_list(cls, data: list) -> "Inventory":
+        return cls(Item.from_dict(item_data) for item_data in data)
 
 
+@dataclass(slots=True, eq=False)
 class Character:
     """Represents a character in the game."""
 
-    def __init__(
-        self,
-        name: str,
-        hp: int,
-        stamina: int = 100,
-        money_oz: float = 0.0,
-        inventory: list = None,
-        location: str = "",
-    ):
-        self.name = name
-        self.hp = hp
-        self.stamina = stamina
-        self.money_oz = money_oz
-        self.inventory = inventory if inventory is not None else []
-        self.location = location
-
-    def to_dict(self):
+    name: str
+    hp: int
+    stamina: int = 100
+    money_oz: float = 0.0
+    inventory: Inventory = field(default_factory=Inventory)
+    location: str = ""
+
+    def __setattr__(self, name, value):
+        # Lists (and None) are wrapped, so the inventory is always indexed
+        if name == "inventory" and not isinstance(value, Inventory):
+            value = Inventory(value)
+        object.__setattr__(self, name, value)
+
+    def to_dict(self) -> dict:
         return {
+            "schema_version": SCHEMA_VERSION,
             "name": self.name,
             "hp": self.hp,
             "stamina": self.stamina,
             "money_oz": self.money_oz,
-            "inventory": [item.to_dict() for item in self.inventory],
+            "inventory": self.inventory.to_list(),
             "location": self.location,
         }
 
     @classmethod
-    def from_dict(cls, data):
-        data["inventory"] = [
-            Item.from_dict(item_data) for item_data in data.get("inventory", [])
-        ]
-        data["stamina"] = data.get("stamina", 100)
-        data["money_oz"] = data.get("money_oz", 0.0)
-        return cls(**data)
+    def from_dict(cls, data: dict) -> "Character":
+        """
+        Builds a character from its dict, migrating older schema versions first.
+        The dict is not modified. Raises ValueError for unsupported versions.
+        """
+        data = migrate_character_data(data)
+        return cls(
+            data["name"],
+            data["hp"],
+            data["stamina"],
+            data["money_oz"],
+            Inventory.from_list(data["inventory"]),
+            data.get("location", ""),
+        )
+
+
+def _migrate_v1(data: dict) -> dict:
+    """Version 1 (unversioned) saves could lack stamina and money."""
+    return {
+        **data,
+        "stamina": data.get("stamina", 100),
+        "money_oz": data.get("money_oz", 0.0),
+        "inventory": data.get("inventory", []),
+    }
 
 
+# schema version -> migration of a dict in that version to the next one
+_MIGRATIONS = {1: _migrate_v1}
+
+
+def migrate_character_data(data: dict) -> dict:
+    """Brings serialized Character data up to SCHEMA_VERSION (new dict if migrated)."""
+    version = data.get("schema_version", 1)
+    if not isinstance(version, int) or version > SCHEMA_VERSION:
+        raise ValueError(f"Unsupported character schema version: {version!r}")
+    while version < SCHEMA_VERSION:
+        data = _MIGRATIONS[version](data)
+        version += 1
+    return data
+
+
+@dataclass(slots=True, eq=False)
 class Location:
     """Represents a location in the game world."""
 
-    def __init__(
-        self, name: str, description: str, exits: dict = None, items: list = None
-    ):
-        self.name = name
-        self.description = description
-        self.exits = exits if exits is not None else {}
-        self.items = items if items is not None else []
+    name: str
+    description: str
+    exits: dict = field(default_factory=dict)
+    items: list = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.exits is None:
+            self.exits = {}
+        if self.items is None:
+            self.items = []
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "exits": dict(self.exits),
+            "items": [item.to_dict() for item in self.items],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Location":
+        return cls(
+            data["name"],
+            data.get("description", ""),
+            dict(data.get("exits") or {}),
+            [Item.from_dict(item_data) for item_data in data.get("items", [])],
+        )
 
 
 # Example
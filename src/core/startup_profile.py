@@ -0,0 +1,101 @@
+# core/startup_profile.py
+
+import sys
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+
+
+class _TimedLoader:
+    """Wraps a module loader and reports how long executing the module took."""
+
+    def __init__(self, loader, name: str, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class StartupProfiler:
+    """
+    Measures where startup time goes (enabled with --profile-startup).
+
+    install() puts a finder at the front of sys.meta_path that times every module
+    imported afterwards, both inclusive (with the modules it imports) and self time.
+    mark() records named milestones, e.g. "menu on screen"; report() prints both.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.inclusive: Dict[str, float] = {}
+        self.exclusive: Dict[str, float] = {}
+        self._stack: List[List] = []  # [name, start, time spent in nested imports]
+
+    # --- Import hook ---
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        _, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.inclusive[name] = elapsed
+        self.exclusive[name] = elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    # --- Milestones and report ---
+
+    def mark(self, label: str):
+        """Records a milestone at the current time."""
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def report(self, top: int = 15, stream: Optional[TextIO] = None):
+        """Prints milestones and the slowest imports (by inclusive time)."""
+        stream = stream or sys.stderr
+        stream.write("Startup profile (ms since launch):\n")
+        for label, elapsed in self.marks:
+            stream.write(f"  {label:<32} {elapsed * 1000:8.1f}\n")
+
+        slowest = sorted(self.inclusive.items(), key=lambda item: item[1], reverse=True)
+        stream.write(
+            f"Slowest imports (inclusive / self ms), {len(self.inclusive)} total:\n"
+        )
+        for name, elapsed in slowest[:top]:
+            stream.write(
+                f"  {name:<32} {elapsed * 1000:8.1f} {self.exclusive[name] * 1000:8.1f}\n"
+            )
+        stream.flush()
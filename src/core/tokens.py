@@ -0,0 +1,23 @@
+# core/tokens.py
+
+from typing import Dict
+
+# Rough per-message overhead of the chat format (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimates tokens for a string (~4 characters per token for English prose)."""
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+def estimate_message_tokens(message: Dict) -> int:
+    """Estimates tokens for a single chat message, including tool call arguments."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_text_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        tokens += estimate_text_tokens(function.get("name", ""))
+        tokens += estimate_text_tokens(function.get("arguments", ""))
+    return tokens
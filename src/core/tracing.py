@@ -0,0 +1,288 @@
+# core/tracing.py
+
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+# The innermost open span of the current thread/context; new spans become its children.
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    """A timed operation within a trace. Use through tracing.span() as a context manager."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.parent: Optional[Span] = _current_span.get()
+        self.name = name
+        self.trace_id = (
+            self.parent.trace_id if self.parent else f"{random.getrandbits(128):032x}"
+        )
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = 0
+        self.end_ns = 0
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent else None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if isinstance(exc, GeneratorExit):
+            self.attributes["cancelled"] = True
+        elif exc is not None:
+            self.record_error(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from a different context (e.g. a generator finalized elsewhere)
+            _current_span.set(self.parent)
+        self._tracer.export(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled, so instrumented code costs a function call."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        trace_dir = os.path.dirname(path)
+        if trace_dir and not os.path.exists(trace_dir):
+            os.makedirs(trace_dir)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def encode(self, span: Span) -> Dict:
+        record = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start_ns": span.start_ns,
+            "end_ns": span.end_ns,
+            "duration_ms": round(span.duration_ms, 3),
+            "attributes": span.attributes,
+        }
+        if span.error:
+            record["error"] = span.error
+        return record
+
+    def export(self, span: Span):
+        line = json.dumps(self.encode(span), default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            # Spans are buffered until their trace's root span ends
+            if span.parent is None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is a string in the OTLP JSON mapping
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpJsonExporter(JsonlExporter):
+    """
+    Writes spans in the OpenTelemetry OTLP/JSON file format: one
+    ExportTraceServiceRequest per line, which OpenTelemetry collectors can ingest.
+    """
+
+    def encode(self, span: Span) -> Dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            # STATUS_CODE_ERROR / STATUS_CODE_UNSET
+            "status": {"code": 2, "message": span.error} if span.error else {},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": "frametale"}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "frametale"}, "spans": [otlp_span]}
+                    ],
+                }
+            ]
+        }
+
+
+EXPORTERS = {"jsonl": JsonlExporter, "otlp": OtlpJsonExporter}
+
+
+class Tracer:
+    def __init__(self, exporter: JsonlExporter):
+        self.exporter = exporter
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Span:
+        return Span(self, name, attributes)
+
+    def export(self, span: Span):
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.error(f"Error exporting span {span.name}: {e}")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def configure(
+    enabled: Optional[bool] = None,
+    path: Optional[str] = None,
+    trace_format: Optional[str] = None,
+) -> bool:
+    """
+    Enables or disables tracing (defaults come from config). Returns True if
+    tracing is enabled afterwards.
+    """
+    global _tracer
+    shutdown()
+    enabled = config.TRACING if enabled is None else enabled
+    if not enabled:
+        return False
+
+    path = path or config.TRACE_FILE
+    trace_format = trace_format or config.TRACE_FORMAT
+    exporter_class = EXPORTERS.get(trace_format)
+    if exporter_class is None:
+        logger.error(f"Unknown trace format: {trace_format}. Tracing disabled.")
+        return False
+    try:
+        _tracer = Tracer(exporter_class(path))
+    except OSError as e:
+        logger.error(f"Error opening trace file {path}: {e}. Tracing disabled.")
+        return False
+    logger.info(f"Tracing enabled ({trace_format}) to {path}")
+    return True
+
+
+def shutdown():
+    """Flushes and closes the trace exporter, disabling tracing."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.exporter.close()
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **attributes):
+    """
+    Returns a context manager timing `name` as a child of the current span.
+    A shared no-op span is returned while tracing is disabled.
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.start_span(name, attributes)
+
+
+def current_span():
+    """Returns the innermost open span (a no-op span if there is none)."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def usage_attributes(usage: Optional[Dict]) -> Dict[str, int]:
+    """Maps a chat-completion `usage` object to span attributes."""
+    if not usage:
+        return {}
+    return {
+        f"llm.{key}": usage[key]
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+        if isinstance(usage.get(key), int)
+    }
@@ -0,0 +1,87 @@
+# core/usage.py
+
+import copy
+import threading
+from typing import Dict, Optional
+
+from core import config
+
+# Call types usage is accounted under: the first narration call of a turn, the
+# follow-up calls of the tool loop, summarization requests, and state extraction
+# by the tool model (split pipeline).
+NARRATION = "narration"
+TOOL_ITERATION = "tool_iteration"
+SUMMARIZATION = "summarization"
+EXTRACTION = "extraction"
+CALL_TYPES = (NARRATION, TOOL_ITERATION, SUMMARIZATION, EXTRACTION)
+
+
+def _empty_totals() -> Dict:
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "unreported_calls": 0,  # Responses without a usage object
+    }
+
+
+def estimate_cost(model: str, usage: Dict) -> float:
+    """
+    Returns the cost of a call in USD: the cost OpenRouter reported in `usage`
+    if present, otherwise an estimate from the configured per-model prices.
+    """
+    if isinstance(usage.get("cost"), (int, float)):
+        return float(usage["cost"])
+    prompt_price, completion_price = config.MODEL_PRICES.get(model, (0.0, 0.0))
+    return (
+        usage.get("prompt_tokens", 0) * prompt_price
+        + usage.get("completion_tokens", 0) * completion_price
+    ) / 1_000_000
+
+
+class UsageLedger:
+    """
+    Token usage and estimated cost of a game session, per call type.
+
+    record() may be called from the turn thread and the background summarizer at
+    the same time, so updates are locked.
+    """
+
+    def __init__(self, totals: Optional[Dict[str, Dict]] = None):
+        self._lock = threading.Lock()
+        self.totals = {call_type: _empty_totals() for call_type in CALL_TYPES}
+        for call_type, values in (totals or {}).items():
+            self.totals.setdefault(call_type, _empty_totals()).update(values)
+
+    def record(self, call_type: str, model: str, usage: Optional[Dict]):
+        """Adds one API call and the `usage` object of its response."""
+        with self._lock:
+            totals = self.totals.setdefault(call_type, _empty_totals())
+            totals["calls"] += 1
+            if not usage:
+                totals["unreported_calls"] += 1
+                return
+            totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            totals["completion_tokens"] += usage.get("completion_tokens") or 0
+            totals["cost"] += estimate_cost(model, usage)
+
+    def summary(self) -> Dict:
+        """Returns a copy of the per-type totals plus a "total" entry."""
+        with self._lock:
+            totals = copy.deepcopy(self.totals)
+        overall = _empty_totals()
+        for values in totals.values():
+            for key in overall:
+                overall[key] += values.get(key, 0)
+        overall["total_tokens"] = overall["prompt_tokens"] + overall["completion_tokens"]
+        totals["total"] = overall
+        return totals
+
+    def to_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return copy.deepcopy(self.totals)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Dict]]) -> "UsageLedger":
+        return cls(data)
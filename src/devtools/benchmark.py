@@ -0,0 +1,402 @@
+"""
+End-to-end turn latency benchmark.
+
+Plays a scripted multi-hundred-turn session through GameEngine against the local
+mock OpenRouter server and reports turn latency percentiles, upstream calls per
+turn, prompt growth, summarization cost, save/load times (including the background
+autosave of every turn) and memory. Results are
+written as JSON so runs on different commits can be compared:
+
+    cd src
+    python -m devtools.benchmark --turns 300 --output before.json
+    # ...change something...
+    python -m devtools.benchmark --turns 300 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+from core import config, tracing
+from devtools.mock_openrouter import MockOpenRouterServer, load_fixture
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "session.json"
+)
+ACTIONS = [
+    "search the maintenance panel",
+    "sneak past the patrol drone",
+    "climb down the service shaft",
+    "talk to the stranger by the vending machine",
+    "rest for a moment",
+    "follow the signs to the lower decks",
+]
+# Metrics compared by --compare; for all of them lower is better.
+COMPARED_METRICS = [
+    ("turn_latency_ms", "p50"),
+    ("turn_latency_ms", "p95"),
+    ("turn_latency_ms", "p99"),
+    ("upstream_calls", "per_turn"),
+    ("prompt_tokens", "last"),
+    ("prompt_tokens", "max"),
+    ("summarization", "prompt_tokens"),
+    ("persistence", "save_ms"),
+    ("persistence", "save_delta_ms"),
+    ("persistence", "autosave_p95_ms"),
+    ("persistence", "load_ms"),
+    ("memory", "max_rss_kb"),
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Returns min/mean/p50/p95/p99/max of the values."""
+    if not values:
+        return {}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "min": min(values),
+        "mean": statistics.fmean(values),
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "max": max(values),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _time_ms(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_benchmark(
+    turns: int = 300,
+    fixture: Optional[Dict] = None,
+    stream: bool = False,
+    trace_memory: bool = False,
+    sample_every: int = 25,
+    think_ms: float = 0,
+) -> Dict:
+    """
+    Plays `turns` player actions against a mock server in a temporary save
+    directory and returns the collected metrics. `think_ms` pauses between turns
+    (not timed), like a player reading, so background work can catch up.
+    """
+    # Imported here so config overrides are in place before the engine is built
+    from game import persistence
+    from game.engine import GameEngine
+    from services.transport import reset_transport
+
+    save_dir = tempfile.mkdtemp(prefix="frametale-bench-")
+    saved_config = (
+        config.OPENROUTER_API_URL,
+        config.OPENROUTER_API_KEY,
+        config.SAVE_DIR,
+    )
+    if trace_memory:
+        tracemalloc.start()
+
+    # Time every slot save, including the autosaves the writer thread does per turn
+    autosave_ms = []
+    save_game_slot = persistence.save_game_slot
+
+    def timed_save_game_slot(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return save_game_slot(*args, **kwargs)
+        finally:
+            autosave_ms.append((time.perf_counter() - start) * 1000)
+
+    persistence.save_game_slot = timed_save_game_slot
+    try:
+        fixture = fixture or load_fixture(DEFAULT_FIXTURE_PATH)
+        with MockOpenRouterServer(fixture) as server:
+            config.OPENROUTER_API_URL = server.url
+            config.OPENROUTER_API_KEY = "mock"
+            config.SAVE_DIR = save_dir
+            reset_transport()
+
+            engine = GameEngine()
+            engine.start_new_game()
+            server.reset_stats()
+
+            latencies = []
+            calls_per_turn = []
+            prompt_tokens = []
+            for turn in range(turns):
+                action = ACTIONS[turn % len(ACTIONS)]
+                calls_before = len(server.calls)
+                start = time.perf_counter()
+                if stream:
+                    for _ in engine.stream_player_action(action):
+                        pass
+                else:
+                    engine.process_player_action(action)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if think_ms:
+                    time.sleep(think_ms / 1000)
+
+                turn_calls = server.calls[calls_before:]
+                calls_per_turn.append(
+                    sum(1 for call in turn_calls if call["kind"] == "narration")
+                )
+                narration = [c for c in turn_calls if c["kind"] == "narration"]
+                if narration:
+                    prompt_tokens.append(narration[-1]["prompt_tokens"])
+
+            # Background summaries and autosaves still in flight are part of the session
+            engine._apply_pending_summary(wait=True)
+            engine.apply_state_changes(wait=True)
+            engine.autosaver.flush()
+            calls = list(server.calls)
+
+            slot_id = engine.game_state.slot_id
+            save_bytes = sum(
+                os.path.getsize(os.path.join(save_dir, name))
+                for name in os.listdir(save_dir)
+            )
+            # Saving the unchanged state again would write nothing (journal), so time
+            # a full snapshot to fresh paths, then journal deltas of one new message
+            player = engine.game_state.player
+            messages = list(engine.game_state.messages)
+            bench_path = os.path.join(save_dir, "bench-{}.json")
+            save_ms = [
+                _time_ms(
+                    persistence.save_game_state, player, messages, bench_path.format(i)
+                )
+                for i in range(5)
+            ]
+            save_delta_ms = []
+            for i in range(5):
+                messages = messages + [{"role": "user", "content": f"Delta {i}"}]
+                save_delta_ms.append(
+                    _time_ms(
+                        persistence.save_game_state,
+                        player,
+                        messages,
+                        bench_path.format(0),
+                    )
+                )
+            load_ms = [_time_ms(engine.load_game, slot_id) for _ in range(5)]
+            history_messages = len(engine.game_state.messages)
+            archived_messages = engine.archived_message_count()
+            engine.close()
+
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        persistence.save_game_slot = save_game_slot
+        if trace_memory:
+            tracemalloc.stop()
+        config.OPENROUTER_API_URL, config.OPENROUTER_API_KEY, config.SAVE_DIR = (
+            saved_config
+        )
+        reset_transport()
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+    kinds = Counter(call["kind"] for call in calls)
+    summaries = [call for call in calls if call["kind"] == "summary"]
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "turns": turns,
+            "stream": stream,
+            "think_ms": think_ms,
+            "background_summarization": config.BACKGROUND_SUMMARIZATION,
+            "structured_turns": config.STRUCTURED_TURNS,
+            "split_tool_pipeline": config.SPLIT_TOOL_PIPELINE,
+            "save_format": config.SAVE_FORMAT,
+            "save_encoding": config.SAVE_ENCODING,
+        },
+        "turn_latency_ms": percentiles(latencies),
+        "upstream_calls": {
+            "total": len(calls),
+            "by_kind": dict(kinds),
+            "per_turn": statistics.fmean(calls_per_turn) if calls_per_turn else 0,
+            "max_per_turn": max(calls_per_turn, default=0),
+            "errors": sum(1 for call in calls if call["status"] != 200),
+        },
+        "prompt_tokens": {
+            "first": prompt_tokens[0] if prompt_tokens else 0,
+            "last": prompt_tokens[-1] if prompt_tokens else 0,
+            "max": max(prompt_tokens, default=0),
+            "samples": prompt_tokens[::sample_every],
+        },
+        "summarization": {
+            "calls": len(summaries),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in summaries),
+            "completion_tokens": sum(call["completion_tokens"] for call in summaries),
+        },
+        "persistence": {
+            # Full snapshot write; journal append of one message (a full write with
+            # SAVE_FORMAT=full); background per-turn autosaves (writer thread)
+            "save_ms": statistics.median(save_ms),
+            "save_delta_ms": statistics.median(save_delta_ms),
+            "autosaves": len(autosave_ms),
+            "autosave_p50_ms": percentiles(autosave_ms).get("p50", 0.0),
+            "autosave_p95_ms": percentiles(autosave_ms).get("p95", 0.0),
+            "load_ms": statistics.median(load_ms),
+            "save_bytes": save_bytes,
+            "history_messages": history_messages,
+            "archived_messages": archived_messages,
+        },
+        "memory": {
+            # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "traced_peak_kb": traced_peak // 1024 if traced_peak is not None else None,
+        },
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """Returns one line per compared metric with its change against the baseline."""
+    lines = []
+    for section, key in COMPARED_METRICS:
+        old = baseline.get(section, {}).get(key)
+        new = results.get(section, {}).get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        lines.append(
+            f"  {section}.{key:<16} {old:12.2f} -> {new:12.2f}  ({change:+.1f}%)"
+        )
+    return lines
+
+
+def format_report(results: Dict) -> str:
+    latency = results["turn_latency_ms"]
+    calls = results["upstream_calls"]
+    prompt = results["prompt_tokens"]
+    summary = results["summarization"]
+    persistence = results["persistence"]
+    memory = results["memory"]
+    return "\n".join(
+        [
+            f"Turns: {results['meta']['turns']} (stream={results['meta']['stream']}, "
+            f"commit={results['meta']['commit']})",
+            f"Turn latency ms: p50={latency['p50']:.2f} p95={latency['p95']:.2f} "
+            f"p99={latency['p99']:.2f} max={latency['max']:.2f}",
+            f"Upstream calls: {calls['total']} {calls['by_kind']}, "
+            f"{calls['per_turn']:.2f}/turn (max {calls['max_per_turn']}), "
+            f"{calls['errors']} errors",
+            f"Prompt tokens: first={prompt['first']} last={prompt['last']} "
+            f"max={prompt['max']}",
+            f"Summarization: {summary['calls']} calls, "
+            f"{summary['prompt_tokens']} prompt tokens",
+            f"Save {persistence['save_ms']:.2f} ms (snapshot), "
+            f"{persistence['save_delta_ms']:.2f} ms (delta), "
+            f"load {persistence['load_ms']:.2f} ms, "
+            f"{persistence['autosaves']} autosaves "
+            f"p50={persistence['autosave_p50_ms']:.2f} "
+            f"p95={persistence['autosave_p95_ms']:.2f} ms, "
+            f"{persistence['save_bytes'] // 1024} KB on disk "
+            f"({persistence['history_messages']} active, "
+            f"{persistence['archived_messages']} archived messages)",
+            f"Memory: max RSS {memory['max_rss_kb']} KB"
+            + (
+                f", traced peak {memory['traced_peak_kb']} KB"
+                if memory["traced_peak_kb"] is not None
+                else ""
+            ),
+        ]
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="FrameTale turn latency benchmark")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE_PATH)
+    parser.add_argument("--latency-ms", type=float, help="Mock response latency.")
+    parser.add_argument("--error-rate", type=float, help="Mock error injection rate.")
+    parser.add_argument("--stream", action="store_true", help="Use streamed turns.")
+    parser.add_argument(
+        "--think-ms", type=float, default=0, help="Untimed pause between turns."
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Narrate without tools; extract state changes with the tool model.",
+    )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Use structured turns (state block instead of tool calls).",
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="Also trace Python allocations."
+    )
+    parser.add_argument("--trace", help="Also write tracing spans (JSONL) to this file.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    fixture = load_fixture(args.fixture)
+    if args.latency_ms is not None:
+        fixture["latency_ms"] = args.latency_ms
+    if args.error_rate is not None:
+        fixture["error_rate"] = args.error_rate
+
+    if args.structured:
+        config.STRUCTURED_TURNS = True
+    if args.split:
+        config.SPLIT_TOOL_PIPELINE = True
+    if args.trace:
+        tracing.configure(enabled=True, path=args.trace, trace_format="jsonl")
+    try:
+        results = run_benchmark(
+            turns=args.turns,
+            fixture=fixture,
+            stream=args.stream,
+            trace_memory=args.tracemalloc,
+            think_ms=args.think_ms,
+        )
+    finally:
+        tracing.shutdown()
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared to {args.compare} ({baseline['meta'].get('commit')}):")
+        print("\n".join(compare(results, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""
+Local stand-in for the OpenRouter chat-completions endpoint.
+
+Serves scripted responses (plain content, tool_calls, SSE streaming) with
+configurable latency and error injection, so the turn pipeline can be run and
+benchmarked offline and deterministically. Point the game at it with
+OPENROUTER_API_URL (any OPENROUTER_API_KEY is accepted):
+
+    cd src
+    python -m devtools.mock_openrouter --port 8099 --latency-ms 200
+    OPENROUTER_API_URL=http://127.0.0.1:8099/api/v1/chat/completions \\
+        OPENROUTER_API_KEY=mock python main.py --headless
+
+Fixture format (JSON, every key optional):
+
+    {
+      "latency_ms": 0,         # delay before each response (time to first byte)
+      "chunk_delay_ms": 0,     # delay between streamed chunks
+      "chunk_chars": 16,       # characters of content per streamed chunk
+      "error_rate": 0.0,       # fraction of requests answered with error_status
+      "error_status": 503,
+      "seed": 0,               # seeds error injection
+      "summary": "...",        # reply to requests without tools (summarization)
+      "script": [              # replies to narration requests, used in a cycle
+        {"content": "You {action}.", "tool_calls": [{"name": "...", "arguments": {}}],
+         "latency_ms": 0, "error_status": 500, "stream_error": "..."}
+      ]
+    }
+
+"{action}" in scripted content is replaced with the player's latest action.
+Requests asking for structured turns (a state block instead of tool calls) get a
+scripted tool-call entry folded into the next entry's content as a state block,
+the way a model following those instructions answers in one call. Narration
+requests without tools (split pipeline) get the next entry's content, and the
+folded tool calls are the reply to the following state extraction request.
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+from core.tokens import estimate_text_tokens
+from game.state_block import STATE_BLOCK_END, STATE_BLOCK_START
+from game.transcript import action_from_prompt
+from services.state_extractor import EXTRACTION_PROMPT
+from services.context_window import estimate_messages_tokens
+
+logger = logging.getLogger(__name__)
+
+COMPLETIONS_PATH = "/api/v1/chat/completions"
+
+DEFAULT_FIXTURE = {
+    "latency_ms": 0,
+    "chunk_delay_ms": 0,
+    "chunk_chars": 16,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "seed": 0,
+    "summary": "User explored the ship.\nUser met strangers.",
+    "script": [
+        {
+            "content": (
+                "You {action}. The corridor hums with distant machinery while "
+                "neon signs flicker over the polished walls of the upper deck."
+            )
+        },
+    ],
+}
+
+
+def load_fixture(path: Optional[str] = None) -> Dict:
+    """Loads a fixture file on top of the defaults (just the defaults if path is None)."""
+    fixture = dict(DEFAULT_FIXTURE)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            fixture.update(json.load(f))
+    return fixture
+
+
+def _last_action(messages: List[Dict]) -> str:
+    """Returns the player's latest action from the request, for {action} placeholders."""
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            return action_from_prompt(msg.get("content")) or "look around"
+    return "look around"
+
+
+def _wants_state_block(messages: List[Dict]) -> bool:
+    """True if the request carries the structured turn instructions."""
+    return any(
+        msg.get("role") == "system" and STATE_BLOCK_START in (msg.get("content") or "")
+        for msg in messages[-4:]
+    )
+
+
+def _state_block(tool_calls: List[Dict]) -> str:
+    changes = [
+        {"tool": call["name"], "args": call.get("arguments", {})}
+        for call in tool_calls
+    ]
+    return f"{STATE_BLOCK_START}{json.dumps({'changes': changes})}{STATE_BLOCK_END}"
+
+
+class MockOpenRouterServer:
+    """
+    Chat-completions server on a background thread. Use as a context manager or
+    call start()/stop(). Every request is recorded in `calls` for benchmarks.
+    """
+
+    def __init__(
+        self, fixture: Optional[Dict] = None, host: str = "127.0.0.1", port: int = 0
+    ):
+        self.fixture = dict(DEFAULT_FIXTURE, **(fixture or {}))
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+        self._script_index = 0
+        self._extraction_calls: List[Dict] = []
+        self._call_count = 0
+        self._random = random.Random(self.fixture.get("seed", 0))
+        self._httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{COMPLETIONS_PATH}"
+
+    def start(self) -> "MockOpenRouterServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-openrouter", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Mock OpenRouter listening on {self.url}")
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        logger.info(f"Mock OpenRouter listening on {self.url}")
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "MockOpenRouterServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = []
+
+    # --- Response planning ---
+
+    def plan_response(self, payload: Dict) -> Dict:
+        """Picks the reply for a request: summary, next scripted entry, or injected error."""
+        messages = payload.get("messages") or []
+        with self._lock:
+            self._call_count += 1
+            call_id = self._call_count
+            has_system = any(msg.get("role") == "system" for msg in messages)
+            if messages and messages[0].get("content") == EXTRACTION_PROMPT:
+                kind = "extraction"
+                entry = {"content": "", "tool_calls": self._extraction_calls}
+                self._extraction_calls = []
+            elif not payload.get("tools") and not has_system:
+                kind = "summary"
+                entry = {"content": self.fixture.get("summary", "")}
+            else:
+                kind = "narration"
+                entry = self._next_script_entry()
+                structured = _wants_state_block(messages)
+                if structured or not payload.get("tools"):
+                    tool_calls = entry.pop("tool_calls", None) or []
+                    if tool_calls and not entry.get("content"):
+                        # Answer with the reply that would follow the tool calls
+                        entry = self._next_script_entry()
+                        tool_calls += entry.pop("tool_calls", None) or []
+                    if structured:
+                        entry["content"] = (
+                            f"{entry.get('content') or ''}\n{_state_block(tool_calls)}"
+                        )
+                    else:
+                        self._extraction_calls = tool_calls
+            inject_error = self._random.random() < self.fixture.get("error_rate", 0.0)
+
+        if inject_error and "error_status" not in entry:
+            entry["error_status"] = self.fixture.get("error_status", 503)
+        if entry.get("content"):
+            entry["content"] = entry["content"].replace(
+                "{action}", _last_action(messages)
+            )
+        entry.update(
+            {
+                "id": f"mock-{call_id}",
+                "kind": kind,
+                "model": payload.get("model", "mock"),
+                "stream": bool(payload.get("stream")),
+                "prompt_tokens": estimate_messages_tokens(messages),
+            }
+        )
+        return entry
+
+    def _next_script_entry(self) -> Dict:
+        script = self.fixture.get("script") or DEFAULT_FIXTURE["script"]
+        entry = dict(script[self._script_index % len(script)])
+        self._script_index += 1
+        return entry
+
+    def record(self, entry: Dict, status: int, messages: int):
+        completion_tokens = estimate_text_tokens(entry.get("content") or "")
+        with self._lock:
+            self.calls.append(
+                {
+                    "kind": entry["kind"],
+                    "model": entry["model"],
+                    "stream": entry["stream"],
+                    "status": status,
+                    "messages": messages,
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "completion_tokens": completion_tokens,
+                    "tool_calls": len(entry.get("tool_calls") or []),
+                }
+            )
+
+
+def _tool_calls(entry: Dict) -> List[Dict]:
+    return [
+        {
+            "id": f"{entry['id']}-call-{i}",
+            "type": "function",
+            "function": {
+                "name": call["name"],
+                "arguments": json.dumps(call.get("arguments", {})),
+            },
+        }
+        for i, call in enumerate(entry.get("tool_calls") or [])
+    ]
+
+
+def _usage(entry: Dict) -> Dict:
+    completion_tokens = estimate_text_tokens(entry.get("content") or "")
+    return {
+        "prompt_tokens": entry["prompt_tokens"],
+        "completion_tokens": completion_tokens,
+        "total_tokens": entry["prompt_tokens"] + completion_tokens,
+    }
+
+
+def completion_body(entry: Dict) -> Dict:
+    """Builds a non-streaming chat.completion response."""
+    tool_calls = _tool_calls(entry)
+    message = {"role": "assistant", "content": entry.get("content") or None}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return {
+        "id": entry["id"],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": entry["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }
+        ],
+        "usage": _usage(entry),
+    }
+
+
+def stream_events(entry: Dict, chunk_chars: int) -> Iterator[Dict]:
+    """Builds the chat.completion.chunk events of a streaming response."""
+
+    def chunk(delta: Dict, finish_reason: Optional[str] = None) -> Dict:
+        return {
+            "id": entry["id"],
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": entry["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    content = entry.get("content") or ""
+    for start in range(0, len(content), max(1, chunk_chars)):
+        yield chunk({"content": content[start : start + chunk_chars]})
+
+    if entry.get("stream_error"):
+        yield {"error": {"code": 502, "message": entry["stream_error"]}}
+        return
+
+    tool_calls = _tool_calls(entry)
+    for index, call in enumerate(tool_calls):
+        arguments = call["function"]["arguments"]
+        head_delta = {"index": index, "id": call["id"], "type": "function"}
+        head_delta["function"] = {"name": call["function"]["name"], "arguments": ""}
+        yield chunk({"tool_calls": [head_delta]})
+        # Arguments arrive in pieces, like the real API
+        middle = len(arguments) // 2
+        for part in (arguments[:middle], arguments[middle:]):
+            part_delta = {"index": index, "function": {"arguments": part}}
+            yield chunk({"tool_calls": [part_delta]})
+
+    final = chunk({}, "tool_calls" if tool_calls else "stop")
+    final["usage"] = _usage(entry)
+    yield final
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection pooling is exercised
+    # Headers and body are separate writes; with Nagle on, delayed ACKs add ~40 ms
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            # Clients may drop a connection instead of reading a stream to the end
+            pass
+
+    def log_message(self, format, *args):
+        logger.debug("mock-openrouter: " + format % args)
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        mock: MockOpenRouterServer = self.server.mock
+        if self.path == "/stats":
+            self._send_json(200, {"calls": mock.calls})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self):
+        mock: MockOpenRouterServer = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON"}})
+            return
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        entry = mock.plan_response(payload)
+        messages = len(payload.get("messages") or [])
+        time.sleep(entry.get("latency_ms", mock.fixture.get("latency_ms", 0)) / 1000)
+
+        status = entry.get("error_status")
+        if status:
+            mock.record(entry, status, messages)
+            self._send_json(
+                status, {"error": {"code": status, "message": "Injected mock error"}}
+            )
+            return
+
+        mock.record(entry, 200, messages)
+        if not entry["stream"]:
+            self._send_json(200, completion_body(entry))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._write_chunk(": OPENROUTER PROCESSING\n\n")
+        chunk_delay = mock.fixture.get("chunk_delay_ms", 0) / 1000
+        for event in stream_events(entry, mock.fixture.get("chunk_chars", 16)):
+            if chunk_delay:
+                time.sleep(chunk_delay)
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")  # Terminating zero-length chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock OpenRouter server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fixture", help="JSON fixture with scripted responses.")
+    parser.add_argument("--latency-ms", type=float, help="Delay before each response.")
+    parser.add_argument("--chunk-delay-ms", type=float, help="Delay between chunks.")
+    parser.add_argument("--error-rate", type=float, help="Fraction of failed requests.")
+    parser.add_argument("--seed", type=int, help="Seed for error injection.")
+    args = parser.parse_args(argv)
+
+    fixture = load_fixture(args.fixture)
+    overrides = {
+        "latency_ms": args.latency_ms,
+        "chunk_delay_ms": args.chunk_delay_ms,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+    fixture.update({k: v for k, v in overrides.items() if v is not None})
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockOpenRouterServer(fixture, host=args.host, port=args.port)
+    print(f"Mock OpenRouter listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
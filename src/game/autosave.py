@@ -0,0 +1,117 @@
+import copy
+import logging
+import threading
+from typing import Dict, List
+
+from core import tracing
+from core.models import Character
+from game import persistence
+
+logger = logging.getLogger(__name__)
+
+
+class AutosaveWriter:
+    """
+    Writes game state snapshots to save slots on a dedicated background thread.
+
+    enqueue() only copies the state and returns, so saving never blocks the caller.
+    Bursts are coalesced per slot: if several snapshots arrive while a write is in
+    progress, only the newest for each slot is written. flush() waits until
+    everything enqueued so far is on disk, and close() flushes and stops the thread.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending: Dict[str, tuple] = {}
+        self._enqueued = 0
+        self._written = 0
+        self._last_result = True
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._worker, name="autosave", daemon=True
+        )
+        self._thread.start()
+
+    def enqueue(
+        self,
+        slot_id: str,
+        player: Character,
+        messages: List[Dict],
+        turn_count: int = 0,
+        archived: List[Dict] = None,
+        usage: Dict = None,
+    ) -> int:
+        """
+        Queues a snapshot of the state for writing and returns its ticket number.
+        `archived` messages (removed from the history since the last enqueue) are
+        appended to the slot's archive before the snapshot is written.
+        """
+        # Messages are immutable once appended, so a shallow copy of the list suffices;
+        # the player is mutated in place by tools and must be copied deeply.
+        player = copy.deepcopy(player)
+        messages = list(messages)
+        archived = list(archived or [])
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("AutosaveWriter is closed.")
+            self._enqueued += 1
+            if slot_id in self._pending:
+                logger.debug(f"Coalescing autosave of slot {slot_id} with a newer snapshot.")
+                # Archived messages of the superseded snapshot must still be written
+                archived = self._pending[slot_id][3] + archived
+            self._pending[slot_id] = (player, messages, turn_count, archived, usage)
+            ticket = self._enqueued
+            self._condition.notify_all()
+        return ticket
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Blocks until every snapshot enqueued so far has been written.
+        Returns True if the last write succeeded within the timeout.
+        """
+        with self._condition:
+            target = self._enqueued
+            done = self._condition.wait_for(
+                lambda: self._written >= target, timeout=timeout
+            )
+            return done and self._last_result
+
+    def close(self, timeout: float = None) -> bool:
+        """Flushes pending writes and stops the writer thread."""
+        result = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+        return result
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                pending = self._pending
+                self._pending = {}
+                ticket = self._enqueued
+
+            result = True
+            for slot_id, snapshot in pending.items():
+                player, messages, turn_count, archived, usage = snapshot
+                with tracing.span(
+                    "save",
+                    slot_id=slot_id,
+                    turn=turn_count,
+                    messages=len(messages),
+                    archived=len(archived),
+                ) as span:
+                    saved = persistence.save_game_slot(
+                        slot_id, player, messages, turn_count, archived, usage
+                    )
+                    span.set_attribute("success", bool(saved))
+                result = saved and result
+
+            with self._condition:
+                self._written = ticket
+                self._last_result = bool(result)
+                self._condition.notify_all()
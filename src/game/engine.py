@@ -1,11 +1,19 @@
+import copy
+import json
 import logging
 from typing import Generator, Tuple, Optional, List, Dict
 
 from core.models import Character
+from core.usage import UsageLedger
 from game.state import GameState
 from game import persistence
+from game.autosave import AutosaveWriter
+from game.transcript import ACTION_PROMPT, transcript_entries
 from services import ai_narrator
-from core import config
+from services.summarizer import BackgroundSummarizer
+from services.state_extractor import BackgroundStateExtractor
+from services.context_window import is_summary
+from core import config, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +24,103 @@ class GameEngine:
     def __init__(self):
         """Initializes the GameEngine."""
         self.game_state = GameState()
+        self.summarizer = (
+            BackgroundSummarizer() if config.BACKGROUND_SUMMARIZATION else None
+        )
+        self.extractor = (
+            BackgroundStateExtractor() if config.SPLIT_TOOL_PIPELINE else None
+        )
+        # All saves go through one writer thread, so journal writes never interleave
+        self.autosaver = AutosaveWriter()
+        # Messages removed from the history (summarized) but not yet archived on disk
+        self._archive_pending: List[Dict] = []
         logger.info("GameEngine initialized.")
 
+    def _apply_pending_summary(self, wait: bool = False):
+        """Splices in any background summary that finished since the last turn."""
+        if self.summarizer:
+            messages, replaced = self.summarizer.apply_pending(
+                self.game_state.messages, wait=wait
+            )
+            self.game_state.messages = messages
+            self._archive_pending.extend(replaced)
+
+    def _collect_inline_summarized(self, before: List[Dict], after: List[Dict]):
+        """Queues conversation messages and summaries an inline summary removed for archiving."""
+        if self.summarizer:
+            return
+        after_ids = {id(msg) for msg in after}
+        self._archive_pending.extend(
+            msg
+            for msg in before
+            if id(msg) not in after_ids
+            and (msg.get("role") != "system" or is_summary(msg))
+        )
+
+    def _schedule_summary(self):
+        """Starts background summarization of old messages, if needed."""
+        if self.summarizer:
+            self.summarizer.schedule(
+                self.game_state.messages, usage=self.game_state.usage
+            )
+
+    def _schedule_state_extraction(self, action: Optional[str], narrative: str):
+        """Starts extracting the turn's state changes with the tool model (split pipeline)."""
+        if self.extractor and narrative:
+            self.extractor.schedule(
+                ai_narrator.describe_player(self.game_state.player),
+                action,
+                narrative,
+                usage=self.game_state.usage,
+            )
+
+    def apply_state_changes(self, wait: bool = True) -> List[str]:
+        """
+        Applies state changes extracted in the background since the last call
+        (split pipeline) and returns their messages for display. The turn's autosave
+        was queued before its changes arrived, so applied changes are saved again.
+        """
+        if not self.extractor or not self.game_state.is_initialized():
+            return []
+        messages = self.extractor.apply_pending(self.game_state.player, wait=wait)
+        if messages and config.AUTOSAVE:
+            self._enqueue_save()
+        return messages
+
+    def _enqueue_save(self) -> int:
+        archived, self._archive_pending = self._archive_pending, []
+        return self.autosaver.enqueue(
+            self.game_state.slot_id,
+            self.game_state.player,
+            self.game_state.messages,
+            self.game_state.turn_count,
+            archived,
+            usage=self.game_state.usage.to_dict(),
+        )
+
+    def _complete_turn(self, action: str, narrative: str):
+        """
+        Post-turn bookkeeping: state extraction, background summary and autosave, all
+        off the turn path.
+        """
+        self.game_state.turn_count += 1
+        self._schedule_state_extraction(action, narrative)
+        self._schedule_summary()
+        if config.AUTOSAVE:
+            self._enqueue_save()
+
     def start_new_game(self) -> Tuple[str, List[Dict]]:
         """
         Starts a new game, initializes the state, and returns the initial narrative.
         """
         logger.info("Starting new game...")
+        if self.summarizer:
+            self.summarizer.cancel()
+        if self.extractor:
+            self.extractor.cancel()
         self.game_state.clear()
+        self._archive_pending = []
+        self.game_state.slot_id = persistence.new_slot_id()
         self.game_state.player = Character(name="Hero", hp=100, inventory=[])
         initial_prompt = "The story is initiated. Please start the story."
         self.game_state.messages = []
@@ -38,9 +135,11 @@ class GameEngine:
             narrative, updated_messages = ai_narrator.get_ai_narrative(
                 self.game_state.player,
                 initial_prompt,
-                list(self.game_state.messages),
+                self.game_state.messages.copy(),
+                usage=self.game_state.usage,
             )
             self.game_state.messages = updated_messages
+            self._schedule_state_extraction(None, narrative)
             return narrative, self.game_state.messages
         except Exception as e:
             logger.exception("Error during new game initialization narrative.")
@@ -49,17 +148,35 @@ class GameEngine:
                 self.game_state.messages,
             )
 
-    def load_game(self) -> bool:
+    def load_game(self, slot_id: Optional[str] = None) -> bool:
         """
-        Loads the game state from the save file.
+        Loads the game state from a save slot (the most recent one by default).
         Returns True if successful, False otherwise.
         """
         logger.info("Attempting to load game...")
-        player, messages = persistence.load_game_state()
+        if self.summarizer:
+            self.summarizer.cancel()
+        if self.extractor:
+            self.extractor.cancel()
+        self._archive_pending = []
+        if slot_id is None:
+            latest = persistence.latest_save_slot()
+            slot_id = latest["slot_id"] if latest else None
+        if slot_id is None:
+            logger.warning("No save slots found.")
+            self.game_state.clear()
+            return False
+
+        with tracing.span("load", slot_id=slot_id):
+            player, messages, usage = persistence.load_game_slot(slot_id)
         if player and messages:
+            slot = persistence.get_save_slot(slot_id) or {}
             self.game_state.player = player
             self.game_state.messages = messages
-            logger.info("Game loaded successfully.")
+            self.game_state.slot_id = slot_id
+            self.game_state.turn_count = slot.get("turn_count", 0)
+            self.game_state.usage = UsageLedger.from_dict(usage)
+            logger.info(f"Game loaded successfully from slot {slot_id}.")
             return True
         else:
             logger.warning("Failed to load game or no save file found.")
@@ -76,16 +193,33 @@ class GameEngine:
             return False
 
         logger.info("Saving game state...")
+        # Called from the UI thread, so don't block on extractions still in flight;
+        # close() waits for those on exit
+        self.apply_state_changes(wait=False)
+        self._apply_pending_summary()
         try:
-            persistence.save_game_state(
-                self.game_state.player, self.game_state.messages
-            )
-            logger.info("Game saved successfully.")
-            return True
+            self._enqueue_save()
+            if self.autosaver.flush():
+                logger.info("Game saved successfully.")
+                return True
+            logger.warning("Game save failed.")
+            return False
         except Exception as e:
             logger.exception("Error saving game state.")
             return False
 
+    def close(self):
+        """Flushes pending saves and stops background workers. Call on exit."""
+        if self.summarizer:
+            self.summarizer.shutdown()
+        if self.extractor:
+            # The last turn's changes are still being extracted; save them too
+            self.apply_state_changes(wait=True)
+            self.extractor.shutdown()
+        if not self.autosaver.close(timeout=10):
+            logger.warning("Pending saves may not have been written before exit.")
+        logger.info("GameEngine closed.")
+
     def process_player_action(self, action: str) -> Tuple[str, List[Dict]]:
         """
         Processes the player's action using the AI narrator and returns the narrative.
@@ -101,22 +235,118 @@ class GameEngine:
             )
 
         logger.debug(f"Processing player action: {action}")
-        next_prompt = f"The player chose to '{action}'. Describe what happens next."
+        next_prompt = ACTION_PROMPT.format(action=action)
 
-        try:
-            narrative, updated_messages = ai_narrator.get_ai_narrative(
-                self.game_state.player,
-                next_prompt,
-                list(self.game_state.messages),
-            )
-            self.game_state.messages = updated_messages
-            return narrative, self.game_state.messages
-        except Exception as e:
-            logger.exception(f"Error processing player action: {action}")
-            return (
-                f"[bold red]Error processing action: {e}[/bold red]\n",
-                self.game_state.messages,
-            )
+        turn = self.game_state.turn_count + 1
+        with tracing.span("turn", turn=turn, stream=False) as span:
+            # The narrator must see the previous turn's state changes
+            self.apply_state_changes()
+            self._apply_pending_summary()
+            try:
+                narrative, updated_messages = ai_narrator.get_ai_narrative(
+                    self.game_state.player,
+                    next_prompt,
+                    self.game_state.messages.copy(),
+                    summarize=self.summarizer is None,
+                    usage=self.game_state.usage,
+                )
+                self._collect_inline_summarized(
+                    self.game_state.messages, updated_messages
+                )
+                self.game_state.messages = updated_messages
+                self._complete_turn(action, narrative)
+                return narrative, self.game_state.messages
+            except Exception as e:
+                logger.exception(f"Error processing player action: {action}")
+                span.record_error(e)
+                return (
+                    f"[bold red]Error processing action: {e}[/bold red]\n",
+                    self.game_state.messages,
+                )
+
+    def stream_player_action(self, action: str) -> Generator[str, None, None]:
+        """
+        Processes the player's action like process_player_action, but yields
+        narrative chunks as they stream in. The game state is updated once the
+        generator is exhausted; closing it early cancels the turn and restores
+        the player to its pre-turn state.
+        """
+        if not self.game_state.is_initialized():
+            logger.error("Cannot process action: Game state not initialized.")
+            yield "[red]Error: Game not started or loaded.[/red]\n"
+            return
+
+        if not config.is_ai_available():
+            yield "[red]Cannot process action: AI Narrator is unavailable.[/red]\n"
+            return
+
+        logger.debug(f"Streaming player action: {action}")
+        next_prompt = ACTION_PROMPT.format(action=action)
+
+        turn = self.game_state.turn_count + 1
+        with tracing.span("turn", turn=turn, stream=True) as span:
+            self.apply_state_changes()
+            # Tools mutate the player as the stream runs; keep a copy to roll back on cancel.
+            player_snapshot = copy.deepcopy(self.game_state.player)
+            self._apply_pending_summary()
+            try:
+                narrative, updated_messages = yield from ai_narrator.stream_ai_narrative(
+                    self.game_state.player,
+                    next_prompt,
+                    self.game_state.messages.copy(),
+                    summarize=self.summarizer is None,
+                    usage=self.game_state.usage,
+                )
+                self._collect_inline_summarized(
+                    self.game_state.messages, updated_messages
+                )
+                self.game_state.messages = updated_messages
+                self._complete_turn(action, narrative)
+            except GeneratorExit:
+                logger.info(f"Turn cancelled, rolling back player state: {action}")
+                self.game_state.player = player_snapshot
+                raise
+            except Exception as e:
+                logger.exception(f"Error streaming player action: {action}")
+                span.record_error(e)
+                yield f"[bold red]Error processing action: {e}[/bold red]\n"
+
+    # --- History access ---
+
+    def archived_message_count(self) -> int:
+        """Returns how many messages of this game were moved out of the active history."""
+        if not self.game_state.slot_id:
+            return 0
+        return persistence.slot_archive(self.game_state.slot_id).count()
+
+    def get_archived_messages(self, start: int, stop: int) -> List[Dict]:
+        """Reads a page of archived (summarized) messages from disk, oldest first."""
+        if not self.game_state.slot_id:
+            return []
+        return persistence.slot_archive(self.game_state.slot_id).read(start, stop)
+
+    def iter_history(self, page_size: int = 200) -> Generator[List[Dict], None, None]:
+        """
+        Yields the full message history page by page: archived messages from disk first,
+        then the active history. Only one page of archived messages is in memory at a time.
+        """
+        if self.game_state.slot_id:
+            archive = persistence.slot_archive(self.game_state.slot_id)
+            yield from archive.iter_pages(page_size)
+        # Summarized but not yet written to the archive
+        if self._archive_pending:
+            yield list(self._archive_pending)
+        yield list(self.game_state.messages)
+
+    def get_transcript(self, max_turns: Optional[int] = None) -> List[Dict]:
+        """
+        Returns the displayable turns of the active history ({"action", "narrative"}),
+        oldest first, limited to the last max_turns.
+        """
+        entries = transcript_entries(self.game_state.messages)
+        if max_turns is not None:
+            entries = entries[-max_turns:] if max_turns > 0 else []
+        return entries
 
     def get_last_message_content(self) -> Optional[str]:
         """Returns the content of the last message, if available."""
@@ -134,6 +364,14 @@ class GameEngine:
                 return f"[italic dim]Tool '{last_msg.get('name', 'unknown')}' executed.[/italic dim]"
         return None
 
+    def get_usage(self) -> Dict:
+        """
+        Returns the token usage and estimated cost (USD) of the current game per
+        call type ("narration", "tool_iteration", "summarization",
+        "extraction") and in "total".
+        """
+        return self.game_state.usage.summary()
+
     def get_player_status(self) -> Dict:
         """Returns a dictionary describing the player's current status."""
         if not self.game_state.player:
@@ -145,7 +383,7 @@ class GameEngine:
                 "inventory": [],
             }
 
-        inventory_names = [item.name for item in self.game_state.player.inventory]
+        inventory_names = self.game_state.player.inventory.names()
 
         return {
             "name": self.game_state.player.name,
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+from array import array
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+# Byte offsets are stored as fixed-width unsigned 64-bit integers, so the offset of
+# message i is at i * OFFSET_SIZE in the index file.
+OFFSET_TYPECODE = "Q"
+OFFSET_SIZE = array(OFFSET_TYPECODE).itemsize
+
+
+class MessageArchive:
+    """
+    Append-only on-disk store for messages that left the active history (e.g. after
+    being summarized), paged by an offset index.
+
+    Messages are stored one JSON object per line in `path`; `path.idx` holds the byte
+    offset of every line. Reading any page costs two seeks, independent of how many
+    messages have been archived, so nothing is loaded until a history view asks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+
+    def count(self) -> int:
+        """Returns the number of archived messages."""
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // OFFSET_SIZE
+
+    def append(self, messages: List[Dict]):
+        """Appends messages to the archive."""
+        if not messages:
+            return
+        archive_dir = os.path.dirname(self.path)
+        if archive_dir and not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+
+        offsets = array(OFFSET_TYPECODE)
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            for msg in messages:
+                line = (json.dumps(msg) + "\n").encode("utf-8")
+                offsets.append(offset)
+                f.write(line)
+                offset += len(line)
+            f.flush()
+        # The index is written after the data, so a crash in between only leaves
+        # unindexed lines, which read() skips.
+        self._truncate_torn_index()
+        with open(self.index_path, "ab") as f:
+            offsets.tofile(f)
+        logger.debug(f"Archived {len(messages)} messages to {self.path}")
+
+    def _truncate_torn_index(self):
+        """
+        Cuts off a partial offset left at the end of the index by a crash mid-write,
+        so the offsets appended next stay aligned (count() already ignores it).
+        """
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.index_path)
+        if size % OFFSET_SIZE:
+            logger.warning(f"Truncating torn entry at the end of {self.index_path}")
+            os.truncate(self.index_path, size - size % OFFSET_SIZE)
+
+    def read(self, start: int, stop: int) -> List[Dict]:
+        """Returns archived messages [start, stop), oldest first."""
+        count = self.count()
+        start, stop = max(0, start), min(stop, count)
+        if start >= stop:
+            return []
+
+        with open(self.index_path, "rb") as f:
+            f.seek(start * OFFSET_SIZE)
+            offsets = array(OFFSET_TYPECODE)
+            offsets.fromfile(f, min(stop + 1, count) - start)
+
+        base = offsets[0]
+        with open(self.path, "rb") as f:
+            f.seek(base)
+            if stop < count:
+                data = f.read(offsets[-1] - base)
+            else:
+                data = f.read()
+
+        # Each message is the line at its indexed offset; lines between them that a
+        # crash left unindexed are skipped
+        messages = []
+        for offset in offsets[: stop - start]:
+            begin = offset - base
+            end = data.find(b"\n", begin)
+            messages.append(json.loads(data[begin : end if end != -1 else len(data)]))
+        return messages
+
+    def iter_pages(self, page_size: int = 200) -> Iterator[List[Dict]]:
+        """Yields the whole archive page by page, oldest first."""
+        count = self.count()
+        for start in range(0, count, page_size):
+            yield self.read(start, start + page_size)
+
+    def delete(self):
+        """Removes the archive files."""
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
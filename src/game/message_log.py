@@ -0,0 +1,166 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from core.tokens import estimate_message_tokens
+
+
+class MessageLog(list):
+    """
+    A chat message list that keeps a per-role index of message positions and a
+    running token estimate.
+
+    Behaves like a regular list (and serializes like one), but role lookups such
+    as "how many system messages" or "where are the last two system messages" are
+    O(1)/O(k) instead of a scan of the whole history, and token_total is O(1).
+    Appends and edits near the tail update both incrementally; slice assignments,
+    sorting and other bulk edits rebuild them. Messages must not be edited in
+    place once added, or the token total goes stale.
+    """
+
+    def __init__(self, messages: Iterable[Dict] = ()):
+        super().__init__(messages)
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        self._role_index = defaultdict(list)
+        self._tokens = 0
+        for i, msg in enumerate(self):
+            self._role_index[msg.get("role")].append(i)
+            self._tokens += estimate_message_tokens(msg)
+
+    def _shift(self, start: int, delta: int):
+        """Shifts indexed positions >= start by delta (touches only the tail of each role list)."""
+        for positions in self._role_index.values():
+            for j in range(bisect_left(positions, start), len(positions)):
+                positions[j] += delta
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MessageLog index out of range")
+        return index
+
+    # --- Role queries ---
+
+    def role_count(self, role: str) -> int:
+        """Returns the number of messages with the given role."""
+        return len(self._role_index.get(role, ()))
+
+    def last_role_indexes(self, role: str, n: int = 1) -> List[int]:
+        """Returns the positions of the last n messages with the given role, oldest first."""
+        positions = self._role_index.get(role, [])
+        return positions[-n:] if n else []
+
+    def role_indexes(self, role: str) -> List[int]:
+        """Returns the positions of all messages with the given role, oldest first."""
+        return list(self._role_index.get(role, ()))
+
+    @property
+    def token_total(self) -> int:
+        """Estimated tokens of all messages (see core.tokens)."""
+        return self._tokens
+
+    def replace_run(self, start: int, stop: int, message: Dict) -> "MessageLog":
+        """
+        Returns a new log with messages[start:stop] replaced by one message. The
+        result is built by slicing, and the role index and token total are carried
+        over (positions after the run are shifted) instead of being rebuilt.
+        """
+        clone = MessageLog.__new__(MessageLog)
+        list.extend(clone, self[:start])
+        list.append(clone, message)
+        list.extend(clone, self[stop:])
+        delta = 1 - (stop - start)
+        clone._role_index = defaultdict(list)
+        for role, positions in self._role_index.items():
+            low, high = bisect_left(positions, start), bisect_left(positions, stop)
+            kept = positions[:low] + [p + delta for p in positions[high:]]
+            if kept:
+                clone._role_index[role] = kept
+        insort(clone._role_index[message.get("role")], start)
+        clone._tokens = (
+            self._tokens
+            - sum(estimate_message_tokens(msg) for msg in self[start:stop])
+            + estimate_message_tokens(message)
+        )
+        return clone
+
+    # --- List mutations ---
+
+    def append(self, message: Dict):
+        self._role_index[message.get("role")].append(len(self))
+        self._tokens += estimate_message_tokens(message)
+        super().append(message)
+
+    def extend(self, messages: Iterable[Dict]):
+        for message in messages:
+            self.append(message)
+
+    def __iadd__(self, messages: Iterable[Dict]):
+        self.extend(messages)
+        return self
+
+    def insert(self, index: int, message: Dict):
+        index = max(0, min(index + len(self) if index < 0 else index, len(self)))
+        self._shift(index, 1)
+        super().insert(index, message)
+        insort(self._role_index[message.get("role")], index)
+        self._tokens += estimate_message_tokens(message)
+
+    def pop(self, index: int = -1) -> Dict:
+        index = self._normalize(index)
+        message = super().pop(index)
+        self._role_index[message.get("role")].remove(index)
+        self._shift(index + 1, -1)
+        self._tokens -= estimate_message_tokens(message)
+        return message
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            super().__delitem__(index)
+            self._rebuild_index()
+            return
+        self.pop(index)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super().__setitem__(index, value)
+            self._rebuild_index()
+            return
+        index = self._normalize(index)
+        old_role = self[index].get("role")
+        self._tokens += estimate_message_tokens(value) - estimate_message_tokens(
+            self[index]
+        )
+        super().__setitem__(index, value)
+        if value.get("role") != old_role:
+            self._role_index[old_role].remove(index)
+            insort(self._role_index[value.get("role")], index)
+
+    def remove(self, message: Dict):
+        self.pop(self.index(message))
+
+    def clear(self):
+        super().clear()
+        self._role_index = defaultdict(list)
+        self._tokens = 0
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._rebuild_index()
+
+    def reverse(self):
+        super().reverse()
+        self._rebuild_index()
+
+    def copy(self) -> "MessageLog":
+        """Returns a shallow copy, carrying the index and token total over."""
+        clone = MessageLog.__new__(MessageLog)
+        list.extend(clone, self)
+        clone._role_index = defaultdict(
+            list, {role: list(positions) for role, positions in self._role_index.items()}
+        )
+        clone._tokens = self._tokens
+        return clone
@@ -1,61 +1,471 @@
 import os
 import json
 import logging
+import tempfile
+import threading
+import time
+import uuid
 from typing import Optional, List, Dict, Tuple
 
 from core.models import Character
 from core import config
+from game import save_codec
+from game.message_archive import MessageArchive
 
 logger = logging.getLogger(__name__)
 
+JOURNAL_SUFFIX = ".journal"
+
+
+def _journal_path(save_path: str) -> str:
+    return save_path + JOURNAL_SUFFIX
+
+
+def _ensure_save_dir(save_path: str):
+    save_dir = os.path.dirname(save_path)
+    if save_dir and not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+        logger.info(f"Created save directory: {save_dir}")
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """Writes data to a temp file, fsyncs it and renames it over path."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=".tmp-", suffix=".save"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_write_save(path: str, game_state: Dict):
+    """Encodes a save with the configured encoding and writes it atomically."""
+    _atomic_write_bytes(path, save_codec.encode_save(game_state, config.SAVE_ENCODING))
+
+
+class SaveJournal:
+    """
+    Append-only journal of message and player deltas on top of a snapshot.
+
+    The snapshot lives at save_path in the regular save format (plus a snapshot_id)
+    and is written atomically. Each save appends one JSON line to save_path.journal:
+
+        {"snapshot": id, "seq": n, "truncate": k, "append": [...], "player": {...},
+         "usage": {...}}
+
+    meaning "cut the message list to k entries, then append these", with "player"
+    and "usage" present only if they changed. Messages are treated as immutable once
+    appended; the delta is found by comparing the new list against the last saved one
+    by identity.
+    The journal is compacted into a new snapshot every config.JOURNAL_COMPACT_EVERY
+    entries, or when a delta would rewrite most of the history (e.g. after a summary).
+    """
+
+    def __init__(self, save_path: str):
+        self.save_path = save_path
+        self.snapshot_id: Optional[str] = None
+        self.seq = 0
+        self.saved_messages: List[Dict] = []
+        self.saved_player: Optional[Dict] = None
+        self.saved_usage: Dict = {}
+
+    def save(
+        self, player: Character, messages: List[Dict], usage: Optional[Dict] = None
+    ):
+        player_data = player.to_dict()
+        usage = usage or {}
+        keep = self._common_prefix(messages)
+        appended = messages[keep:]
+
+        if (
+            self.snapshot_id is None
+            or not os.path.exists(self.save_path)
+            or self.seq >= config.JOURNAL_COMPACT_EVERY
+            or len(appended) > max(len(messages) // 2, 16)
+        ):
+            self.compact(player_data, messages, usage)
+            return
+
+        entry = {"snapshot": self.snapshot_id, "seq": self.seq + 1}
+        if keep < len(self.saved_messages) or appended:
+            entry["truncate"] = keep
+            entry["append"] = appended
+        if player_data != self.saved_player:
+            entry["player"] = player_data
+        if usage != self.saved_usage:
+            entry["usage"] = usage
+        if len(entry) == 2:
+            logger.debug("Nothing changed since last save; journal untouched.")
+            return
+
+        with open(_journal_path(self.save_path), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.seq += 1
+        self._remember(player_data, messages, usage)
+        logger.info(
+            f"Journaled save #{self.seq} to {self.save_path} ({len(appended)} new messages)."
+        )
+
+    def compact(self, player_data: Dict, messages: List[Dict], usage: Dict):
+        """Writes a fresh snapshot atomically and starts a new, empty journal."""
+        _ensure_save_dir(self.save_path)
+        snapshot_id = uuid.uuid4().hex
+        _atomic_write_save(
+            self.save_path,
+            {
+                "player": player_data,
+                "messages": list(messages),
+                "usage": usage,
+                "snapshot_id": snapshot_id,
+            },
+        )
+        # Entries of the old journal name the old snapshot id, so a crash before this
+        # truncation can never replay them on top of the new snapshot.
+        open(_journal_path(self.save_path), "w").close()
+        self.snapshot_id = snapshot_id
+        self.seq = 0
+        self._remember(player_data, messages, usage)
+        logger.info(f"Wrote compacted snapshot to {self.save_path}")
+
+    def _remember(self, player_data: Dict, messages: List[Dict], usage: Dict):
+        self.saved_messages = list(messages)
+        self.saved_player = player_data
+        self.saved_usage = usage
+
+    def _common_prefix(self, messages: List[Dict]) -> int:
+        saved = self.saved_messages
+        limit = min(len(saved), len(messages))
+        i = 0
+        while i < limit and messages[i] is saved[i]:
+            i += 1
+        return i
+
+
+_journals: Dict[str, SaveJournal] = {}
+
+
+def _get_journal(save_path: str) -> SaveJournal:
+    key = os.path.abspath(save_path)
+    if key not in _journals:
+        _journals[key] = SaveJournal(save_path)
+    return _journals[key]
+
+
+def _replay_journal(
+    save_path: str,
+    snapshot_id: Optional[str],
+    player_data: Dict,
+    messages: List[Dict],
+    usage: Dict,
+) -> Tuple[Dict, List[Dict], Dict, int, bool]:
+    """
+    Applies journal entries written on top of snapshot_id. Returns the final state,
+    the last sequence number and whether the journal ended without a torn entry.
+    """
+    journal_path = _journal_path(save_path)
+    seq = 0
+    intact = True
+    if not snapshot_id or not os.path.exists(journal_path):
+        return player_data, messages, usage, seq, intact
+
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-append; everything before it is intact.
+                logger.warning(f"Ignoring incomplete journal entry in {journal_path}")
+                intact = False
+                break
+            if entry.get("snapshot") != snapshot_id:
+                continue
+            if "truncate" in entry:
+                del messages[entry["truncate"] :]
+                messages.extend(entry.get("append", []))
+            if "player" in entry:
+                player_data = entry["player"]
+            if "usage" in entry:
+                usage = entry["usage"]
+            seq = entry.get("seq", seq + 1)
+    if seq:
+        logger.info(f"Replayed {seq} journal entries from {journal_path}")
+    return player_data, messages, usage, seq, intact
+
 
 def save_game_state(
-    player: Character, messages: List[Dict], save_path: str = config.SAVE_FILE_PATH
-):
-    """Saves the current game state (player and messages) to a JSON file."""
+    player: Character,
+    messages: List[Dict],
+    save_path: str,
+    usage: Optional[Dict] = None,
+) -> bool:
+    """
+    Saves the current game state (player, messages and token usage totals) to a JSON
+    file. Returns True if successful, False otherwise.
+    """
     try:
-        game_state = {"player": player.to_dict(), "messages": messages}
-        save_dir = os.path.dirname(save_path)
-        if save_dir and not os.path.exists(save_dir):
-            os.makedirs(save_dir)
-            logger.info(f"Created save directory: {save_dir}")
-
-        with open(save_path, "w") as f:
-            json.dump(game_state, f, indent=4)
+        _ensure_save_dir(save_path)
+
+        if config.SAVE_FORMAT == "journal":
+            _get_journal(save_path).save(player, messages, usage)
+            return True
+
+        game_state = {
+            "player": player.to_dict(),
+            "messages": list(messages),
+            "usage": usage or {},
+        }
+        _atomic_write_save(save_path, game_state)
+        # A full save supersedes any journal written on top of an older snapshot
+        if os.path.exists(_journal_path(save_path)):
+            os.remove(_journal_path(save_path))
+        _journals.pop(os.path.abspath(save_path), None)
         logger.info(f"Game state saved successfully to {save_path}")
+        return True
     except IOError as e:
         logger.error(f"Error saving game state to {save_path}: {e}")
     except Exception as e:
         logger.exception(f"An unexpected error occurred during saving: {e}")
+    return False
 
 
 def load_game_state(
-    save_path: str = config.SAVE_FILE_PATH,
-) -> Tuple[Optional[Character], Optional[List[Dict]]]:
-    """Loads the game state from a JSON file."""
+    save_path: str,
+) -> Tuple[Optional[Character], Optional[List[Dict]], Optional[Dict]]:
+    """
+    Loads the game state from a save file (plain or compressed, detected automatically),
+    replaying its journal if there is one. Returns the player, the messages and the
+    token usage totals ({} for saves written before usage was tracked).
+    """
     if not os.path.exists(save_path):
         logger.info(f"No save file found at {save_path}. Cannot load game.")
-        return None, None
+        return None, None, None
     try:
-        with open(save_path, "r") as f:
-            game_state = json.load(f)
+        with open(save_path, "rb") as f:
+            game_state = save_codec.decode_save(f.read())
         player_data = game_state.get("player")
         messages = game_state.get("messages")
         if not player_data or not isinstance(messages, list):
             logger.error(
                 f"Invalid save file format in {save_path}. Missing 'player' or 'messages' (must be a list)."
             )
-            return None, None
+            return None, None, None
+
+        snapshot_id = game_state.get("snapshot_id")
+        player_data, messages, usage, seq, intact = _replay_journal(
+            save_path, snapshot_id, player_data, messages, game_state.get("usage") or {}
+        )
+
+        # Let the next journaled save append to this snapshot instead of rewriting it.
+        # Entries appended after a torn one would be unreadable, so in that case the
+        # next save compacts into a fresh snapshot (and empty journal) instead.
+        journal = _get_journal(save_path)
+        journal.snapshot_id = snapshot_id if intact else None
+        journal.seq = seq
+        journal._remember(player_data, messages, usage)
 
         player = Character.from_dict(player_data)
         logger.info(f"Game state loaded successfully from {save_path}")
-        return player, messages
+        return player, messages, usage
     except json.JSONDecodeError as e:
         logger.error(f"Error decoding JSON from save file {save_path}: {e}")
-        return None, None
+        return None, None, None
     except IOError as e:
         logger.error(f"Error reading save file {save_path}: {e}")
-        return None, None
+        return None, None, None
     except Exception as e:
         logger.exception(f"An unexpected error occurred during loading: {e}")
-        return None, None
+        return None, None, None
+
+
+# --- Save slots ---
+
+CATALOG_FILE_NAME = "catalog.json"
+CATALOG_VERSION = 1
+# Loaded catalogs by save directory, so changing config.SAVE_DIR (as the benchmark
+# does) never mixes slots of different directories
+_catalogs: Dict[str, Dict[str, Dict]] = {}
+_catalog_lock = threading.RLock()
+
+
+def _catalog_path() -> str:
+    return os.path.join(config.SAVE_DIR, CATALOG_FILE_NAME)
+
+
+def new_slot_id() -> str:
+    """Returns a fresh, sortable save slot id."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def slot_save_path(slot_id: str) -> str:
+    """Returns the save file path for a slot."""
+    # The name is the same for every SAVE_ENCODING: the encoding of a snapshot is
+    # detected from its content on load, and it can change between sessions (the
+    # next compaction rewrites the snapshot), so a slot never moves to a new file.
+    return os.path.join(config.SAVE_DIR, f"{slot_id}.json")
+
+
+def slot_archive(slot_id: str) -> MessageArchive:
+    """Returns the archive of messages that left a slot's active history."""
+    return MessageArchive(os.path.join(config.SAVE_DIR, f"{slot_id}.archive"))
+
+
+def _save_size(save_path: str) -> int:
+    paths = [save_path, _journal_path(save_path)]
+    slot_id = os.path.basename(save_path)[: -len(".json")]
+    archive = slot_archive(slot_id)
+    paths += [archive.path, archive.index_path]
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def _write_catalog():
+    _ensure_save_dir(_catalog_path())
+    data = {"version": CATALOG_VERSION, "slots": _load_catalog()}
+    _atomic_write_bytes(_catalog_path(), json.dumps(data).encode("utf-8"))
+
+
+def _rebuild_catalog() -> Dict[str, Dict]:
+    """
+    Recreates the catalog by opening every save in SAVE_DIR. Only used when the
+    catalog is missing or unreadable; turn counts are approximated from the
+    user messages still in each save, and usage totals are read from the save.
+    A single-file save from before slots existed (SAVE_DIR/save.json) is picked
+    up here as the slot "save" on the first run.
+    """
+    logger.info(f"Rebuilding save catalog from {config.SAVE_DIR}")
+    catalog = {}
+    if not os.path.isdir(config.SAVE_DIR):
+        return catalog
+    for file_name in os.listdir(config.SAVE_DIR):
+        if (
+            not file_name.endswith(".json")
+            or file_name == CATALOG_FILE_NAME
+            or file_name.startswith(".")
+        ):
+            continue
+        slot_id = file_name[: -len(".json")]
+        save_path = slot_save_path(slot_id)
+        player, messages, usage = load_game_state(save_path)
+        if not player:
+            continue
+        catalog[slot_id] = {
+            "slot_id": slot_id,
+            "player_name": player.name,
+            "turn_count": sum(1 for msg in messages if msg.get("role") == "user"),
+            "timestamp": os.path.getmtime(save_path),
+            "size": _save_size(save_path),
+            "usage": usage,
+        }
+    return catalog
+
+
+def _load_catalog() -> Dict[str, Dict]:
+    """Returns the catalog of the current SAVE_DIR, loading or rebuilding it once."""
+    key = os.path.abspath(config.SAVE_DIR)
+    with _catalog_lock:
+        if key in _catalogs:
+            return _catalogs[key]
+        try:
+            with open(_catalog_path(), "r") as f:
+                data = json.load(f)
+            if (
+                not isinstance(data, dict)
+                or data.get("version") != CATALOG_VERSION
+                or not isinstance(data.get("slots"), dict)
+            ):
+                raise ValueError("Unsupported catalog format")
+            _catalogs[key] = data["slots"]
+        except (IOError, ValueError) as e:
+            if os.path.exists(_catalog_path()):
+                logger.warning(f"Save catalog unreadable ({e}); rebuilding.")
+            _catalogs[key] = _rebuild_catalog()
+            if _catalogs[key]:
+                _write_catalog()
+        return _catalogs[key]
+
+
+def list_save_slots() -> List[Dict]:
+    """Returns catalog entries for all save slots, most recent first (reads only the catalog)."""
+    with _catalog_lock:
+        slots = list(_load_catalog().values())
+    return sorted(slots, key=lambda slot: slot["timestamp"], reverse=True)
+
+
+def get_save_slot(slot_id: str) -> Optional[Dict]:
+    """Returns the catalog entry for a slot, if it exists."""
+    with _catalog_lock:
+        return _load_catalog().get(slot_id)
+
+
+def latest_save_slot() -> Optional[Dict]:
+    """Returns the most recently saved slot, if any."""
+    slots = list_save_slots()
+    return slots[0] if slots else None
+
+
+def save_game_slot(
+    slot_id: str,
+    player: Character,
+    messages: List[Dict],
+    turn_count: int = 0,
+    archived: List[Dict] = None,
+    usage: Optional[Dict] = None,
+) -> bool:
+    """
+    Saves the game to a slot and updates its catalog entry. Messages that left the
+    active history since the last save are appended to the slot's archive first.
+    `usage` (the session's token usage totals) is written to the save itself and
+    mirrored in the catalog entry, so listing slots never opens a save.
+    """
+    save_path = slot_save_path(slot_id)
+    if archived:
+        try:
+            slot_archive(slot_id).append(archived)
+        except IOError as e:
+            logger.error(f"Error archiving messages for slot {slot_id}: {e}")
+            return False
+    if not save_game_state(player, messages, save_path, usage):
+        return False
+    try:
+        with _catalog_lock:
+            _load_catalog()[slot_id] = {
+                "slot_id": slot_id,
+                "player_name": player.name,
+                "turn_count": turn_count,
+                "timestamp": time.time(),
+                "size": _save_size(save_path),
+                "usage": usage or {},
+            }
+            _write_catalog()
+    except Exception as e:
+        logger.exception(f"Error updating save catalog for slot {slot_id}: {e}")
+    return True
+
+
+def load_game_slot(
+    slot_id: str,
+) -> Tuple[Optional[Character], Optional[List[Dict]], Optional[Dict]]:
+    """Loads the game state (player, messages and usage totals) saved in a slot."""
+    return load_game_state(slot_save_path(slot_id))
+
+
+def delete_save_slot(slot_id: str) -> bool:
+    """Deletes a slot's save files and catalog entry."""
+    save_path = slot_save_path(slot_id)
+    for path in (save_path, _journal_path(save_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    slot_archive(slot_id).delete()
+    _journals.pop(os.path.abspath(save_path), None)
+    with _catalog_lock:
+        removed = _load_catalog().pop(slot_id, None)
+        _write_catalog()
+    return removed is not None
@@ -0,0 +1,87 @@
+import gzip
+import json
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+COMPACT_FORMAT = "frametale-compact"
+COMPACT_VERSION = 1
+# Only long strings are worth a table entry; short ones compress fine inline.
+INTERN_MIN_LENGTH = 64
+GZIP_LEVEL = 6
+
+
+def _intern_messages(messages: List[Dict]) -> Tuple[List[str], List[Dict]]:
+    """Moves message contents that repeat into a string table, referenced by index."""
+    counts = Counter(
+        msg["content"]
+        for msg in messages
+        if isinstance(msg.get("content"), str)
+        and len(msg["content"]) >= INTERN_MIN_LENGTH
+    )
+    table = [text for text, count in counts.items() if count > 1]
+    index = {text: i for i, text in enumerate(table)}
+
+    encoded = []
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str) and content in index:
+            msg = {k: v for k, v in msg.items() if k != "content"}
+            msg["content_ref"] = index[content]
+        encoded.append(msg)
+    return table, encoded
+
+
+def _expand_messages(table: List[str], messages: List[Dict]) -> List[Dict]:
+    expanded = []
+    for msg in messages:
+        if "content_ref" in msg:
+            msg = dict(msg)
+            msg["content"] = table[msg.pop("content_ref")]
+        expanded.append(msg)
+    return expanded
+
+
+def encode_save(game_state: Dict, encoding: str = "json") -> bytes:
+    """
+    Encodes a save dict ({"player", "messages", ...}).
+
+    "json" is the readable, indented legacy format. "gzip" writes compact JSON with
+    repeated long message contents interned into a string table, gzip-compressed.
+    """
+    if encoding == "json":
+        return json.dumps(game_state, indent=4).encode("utf-8")
+    if encoding == "gzip":
+        table, messages = _intern_messages(game_state.get("messages", []))
+        compact = dict(game_state)
+        compact.update(
+            {
+                "format": COMPACT_FORMAT,
+                "version": COMPACT_VERSION,
+                "strings": table,
+                "messages": messages,
+            }
+        )
+        raw = json.dumps(compact, separators=(",", ":")).encode("utf-8")
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unknown save encoding: {encoding}")
+
+
+def decode_save(data: bytes) -> Dict:
+    """Decodes a save written in any supported encoding, detected from its content."""
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    game_state = json.loads(data)
+    if isinstance(game_state, dict) and game_state.get("format") == COMPACT_FORMAT:
+        if game_state.get("version", 0) > COMPACT_VERSION:
+            raise ValueError(
+                f"Save format version {game_state.get('version')} is newer than supported."
+            )
+        table = game_state.pop("strings", [])
+        game_state.pop("format")
+        game_state.pop("version", None)
+        game_state["messages"] = _expand_messages(table, game_state.get("messages", []))
+    return game_state
@@ -2,6 +2,8 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 
 from core.models import Character
+from core.usage import UsageLedger
+from game.message_log import MessageLog
 
 
 @dataclass
@@ -9,7 +11,16 @@ class GameState:
     """Represents the current state of the game."""
 
     player: Optional[Character] = None
-    messages: List[Dict] = field(default_factory=list)
+    messages: List[Dict] = field(default_factory=MessageLog)
+    slot_id: Optional[str] = None
+    turn_count: int = 0
+    usage: UsageLedger = field(default_factory=UsageLedger)
+
+    def __setattr__(self, name, value):
+        # Keep the history indexed by role however it was produced (loaded, spliced, ...)
+        if name == "messages" and not isinstance(value, MessageLog):
+            value = MessageLog(value)
+        super().__setattr__(name, value)
 
     def is_initialized(self) -> bool:
         """Checks if the game state has a player character."""
@@ -18,4 +29,7 @@ class GameState:
     def clear(self):
         """Resets the game state."""
         self.player = None
-        self.messages = []
+        self.messages = MessageLog()
+        self.slot_id = None
+        self.turn_count = 0
+        self.usage = UsageLedger()
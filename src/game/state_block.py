@@ -0,0 +1,114 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from game.tools import tools
+
+logger = logging.getLogger(__name__)
+
+# Structured turns: the narrator ends its reply with the turn's state changes as a
+# JSON block between these tags, instead of requesting tool calls that each cost an
+# extra round trip. The block is stripped from the narrative and applied locally.
+STATE_BLOCK_START = "<state>"
+STATE_BLOCK_END = "</state>"
+
+TOOL_SCHEMAS = {tool["function"]["name"]: tool["function"] for tool in tools}
+
+
+@lru_cache(maxsize=1)
+def structured_turn_instructions() -> str:
+    """Describes the state block format and the available changes (built from the tool schemas)."""
+    lines = [
+        "Do not call tools. Instead, after the narrative, list every change to the "
+        f"player's state in a single {STATE_BLOCK_START}...{STATE_BLOCK_END} block "
+        'holding a JSON object: {"changes": [{"tool": NAME, "args": {...}}]}. '
+        f'Write {STATE_BLOCK_START}{{"changes": []}}{STATE_BLOCK_END} if nothing '
+        "changed. Available changes:"
+    ]
+    for name, schema in TOOL_SCHEMAS.items():
+        parameters = schema["parameters"]
+        required = set(parameters.get("required", []))
+        args = ", ".join(
+            f"{arg}: {spec['type']}" + ("" if arg in required else " (optional)")
+            for arg, spec in parameters["properties"].items()
+        )
+        lines.append(f"- {name}({args}): {schema['description']}")
+    return "\n".join(lines)
+
+
+def split_state_block(content: str) -> Tuple[str, Optional[str]]:
+    """
+    Splits a reply into the narrative and the raw state block body (None if the
+    reply has no block). An unterminated block runs to the end of the reply.
+    """
+    start = content.rfind(STATE_BLOCK_START)
+    if start == -1:
+        return content, None
+    end = content.find(STATE_BLOCK_END, start)
+    block_end = len(content) if end == -1 else end + len(STATE_BLOCK_END)
+    body = content[start + len(STATE_BLOCK_START) : end if end != -1 else len(content)]
+    narrative = (content[:start] + content[block_end:]).strip()
+    return narrative, body.strip()
+
+
+def parse_state_changes(body: str) -> Tuple[List[Tuple[str, Dict]], List[str]]:
+    """
+    Parses a state block body. Returns its (tool_name, args) changes in order and
+    an error message for each malformed entry. Arguments are validated when the
+    changes are dispatched.
+    """
+    # Models sometimes wrap the JSON in a code fence
+    body = body.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        return [], [f"Invalid state block JSON: {e}"]
+    changes = data.get("changes") if isinstance(data, dict) else data
+    if not isinstance(changes, list):
+        return [], ["State block has no list of changes."]
+
+    valid, errors = [], []
+    for change in changes:
+        if not isinstance(change, dict):
+            errors.append(f"Invalid change: {change!r}")
+            continue
+        if not isinstance(change.get("tool"), str):
+            errors.append(f"Change without a tool name: {change!r}")
+            continue
+        valid.append((change["tool"], change.get("args", {})))
+    return valid, errors
+
+
+class StateBlockFilter:
+    """
+    Removes the state block from streamed narrative chunks, so it is never shown.
+
+    Text that could be the start of the opening tag is held back until the next
+    chunk decides it; finish() releases whatever is still held at the end.
+    """
+
+    def __init__(self):
+        self._held = ""
+        self._in_block = False
+
+    def feed(self, text: str) -> str:
+        """Returns the part of `text` that is safe to display now."""
+        if self._in_block:
+            return ""
+        text = self._held + text
+        self._held = ""
+        start = text.find(STATE_BLOCK_START)
+        if start != -1:
+            self._in_block = True
+            return text[:start]
+        # Hold back a trailing partial "<state" until the next chunk arrives
+        for length in range(min(len(STATE_BLOCK_START) - 1, len(text)), 0, -1):
+            if STATE_BLOCK_START.startswith(text[-length:]):
+                self._held = text[-length:]
+                return text[:-length]
+        return text
+
+    def finish(self) -> str:
+        held, self._held = self._held, ""
+        return "" if self._in_block else held
@@ -1,4 +1,10 @@
+import json
 import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core import tracing
 from core.models import Character, Item
 
 logger = logging.getLogger(__name__)
@@ -19,17 +25,34 @@ def change_player_hp(player: Character, amount: int) -> dict[str, any]:
 
 
 def add_item_to_inventory(
-    player: Character, item_name: str, item_description: str, item_value: int = 0
+    player: Character,
+    item_name: str,
+    item_description: str,
+    item_value: int = 0,
+    quantity: int = 1,
 ) -> dict[str, any]:
-    """Adds a new item to the player's inventory."""
-    logger.info(f"Tool: Adding item '{item_name}' to player inventory.")
-    new_item = Item(name=item_name, description=item_description, value=item_value)
-    player.inventory.append(new_item)
-    logger.info(
-        f"Tool: Player inventory now contains: {[item.name for item in player.inventory]}"
+    """Adds an item to the player's inventory, stacking it with held ones of the same name."""
+    logger.info(f"Tool: Adding {quantity} x '{item_name}' to player inventory.")
+    if quantity < 1:
+        return {
+            "success": False,
+            "item_added": None,
+            "message": "Quantity must be at least 1.",
+        }
+    new_item = Item(
+        name=item_name,
+        description=item_description,
+        value=item_value,
+        quantity=quantity,
     )
-    message = f"You recieved: {item_name}."
-    return {"success": True, "item_added": item_name, "message": message}
+    stack = player.inventory.add(new_item)
+    message = f"You recieved: {new_item.display_name}."
+    return {
+        "success": True,
+        "item_added": item_name,
+        "quantity": stack.quantity,
+        "message": message,
+    }
 
 
 def change_player_stamina(player: Character, amount: int) -> dict[str, any]:
@@ -64,14 +87,18 @@ def change_player_money(player: Character, amount: float) -> dict[str, any]:
     return {"success": True, "new_money_oz": player.money_oz, "message": message}
 
 
-def remove_item_from_inventory(player: Character, item_name: str) -> dict[str, any]:
-    """Removes an item from the player's inventory by name."""
+def remove_item_from_inventory(
+    player: Character, item_name: str, quantity: int = None
+) -> dict[str, any]:
+    """Removes an item (all of its stack unless a quantity is given) by name."""
     logger.info(f"Tool: Attempting to remove item '{item_name}' from player inventory.")
-    initial_inventory_size = len(player.inventory)
-    player.inventory = [
-        item for item in player.inventory if item.name.lower() != item_name.lower()
-    ]
-    if len(player.inventory) < initial_inventory_size:
+    if quantity is not None and quantity < 1:
+        return {
+            "success": False,
+            "item_removed": None,
+            "message": "Quantity must be at least 1.",
+        }
+    if player.inventory.remove(item_name, quantity) is not None:
         logger.info(f"Tool: Item '{item_name}' removed successfully.")
         message = f"'{item_name}' has been removed from your inventory."
         return {"success": True, "item_removed": item_name, "message": message}
@@ -89,16 +116,16 @@ def modify_item_in_inventory(
 ) -> dict[str, any]:
     """Modifies an item in the player's inventory by name."""
     logger.info(f"Tool: Attempting to modify item '{item_name}' in player inventory.")
-    for item in player.inventory:
-        if item.name.lower() == item_name.lower():
-            if new_description is not None:
-                item.description = new_description
-                logger.info(f"Tool: Updated description for '{item_name}'.")
-            if new_value is not None:
-                item.value = new_value
-                logger.info(f"Tool: Updated value for '{item_name}'.")
-            message = f"'{item_name}' has been updated."
-            return {"success": True, "item_modified": item_name, "message": message}
+    item = player.inventory.get(item_name)
+    if item is not None:
+        if new_description is not None:
+            item.description = new_description
+            logger.info(f"Tool: Updated description for '{item_name}'.")
+        if new_value is not None:
+            item.value = new_value
+            logger.info(f"Tool: Updated value for '{item_name}'.")
+        message = f"'{item_name}' has been updated."
+        return {"success": True, "item_modified": item_name, "message": message}
     logger.warning(
         f"Tool: Item '{item_name}' not found in player inventory for modification."
     )
@@ -153,6 +180,10 @@ tools = [
                         "type": "integer",
                         "description": "The value of the item (optional, defaults to 0).",
                     },
+                    "quantity": {
+                        "type": "integer",
+                        "description": "How many of the item to add (optional, defaults to 1).",
+                    },
                 },
                 "required": ["item_name", "item_description"],
             },
@@ -169,7 +200,11 @@ tools = [
                     "item_name": {
                         "type": "string",
                         "description": "The name of the item to remove.",
-                    }
+                    },
+                    "quantity": {
+                        "type": "integer",
+                        "description": "How many to remove (optional, defaults to all of them).",
+                    },
                 },
                 "required": ["item_name"],
             },
@@ -235,3 +270,212 @@ tools = [
         },
     },
 ]
+
+
+# --- Dispatcher ---
+
+
+class ToolArgumentError(ValueError):
+    """Raised when tool call arguments don't match the tool's parameter schema."""
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError("a boolean is not an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise TypeError(f"{value!r} is not an integer")
+
+
+def _to_number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError("a boolean is not a number")
+    if isinstance(value, (int, float, str)):
+        number = float(value)
+        if math.isfinite(number):
+            return number
+    raise TypeError(f"{value!r} is not a finite number")
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError(f"{value!r} is not a string")
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise TypeError(f"{value!r} is not a boolean")
+
+
+# JSON Schema "type" -> coercion of a model-provided value (models send "5", 5.0, ...)
+_COERCIONS = {
+    "integer": _to_integer,
+    "number": _to_number,
+    "string": _to_string,
+    "boolean": _to_boolean,
+}
+
+
+def _compile_validator(function: Dict) -> Callable[[Dict], Dict]:
+    """Builds a function that validates and coerces a tool's arguments from its schema."""
+    tool_name = function["name"]
+    parameters = function.get("parameters", {})
+    required = tuple(parameters.get("required", []))
+    coercions = {
+        arg: _COERCIONS.get(spec.get("type"), lambda value: value)
+        for arg, spec in parameters.get("properties", {}).items()
+    }
+
+    def validate(args: Dict) -> Dict:
+        if not isinstance(args, dict):
+            raise ToolArgumentError(f"Arguments of '{tool_name}' must be an object.")
+        missing = [arg for arg in required if args.get(arg) is None]
+        if missing:
+            raise ToolArgumentError(
+                f"Missing arguments for '{tool_name}': {', '.join(missing)}."
+            )
+        coerced = {}
+        for arg, value in args.items():
+            coerce = coercions.get(arg)
+            if coerce is None:
+                raise ToolArgumentError(
+                    f"Unexpected argument '{arg}' for '{tool_name}'."
+                )
+            if value is None:
+                continue  # An optional argument left out
+            try:
+                coerced[arg] = coerce(value)
+            except (TypeError, ValueError) as e:
+                raise ToolArgumentError(
+                    f"Invalid argument '{arg}' for '{tool_name}': {e}"
+                ) from None
+        return coerced
+
+    return validate
+
+
+# Compiled once from the schemas sent to the model
+TOOL_VALIDATORS = {
+    tool["function"]["name"]: _compile_validator(tool["function"])
+    for tool in tools
+    if tool["function"]["name"] in TOOL_MAPPING
+}
+
+
+def validate_tool_call(tool_name: str, args: Any) -> Dict:
+    """
+    Returns the tool's arguments validated and coerced to their schema types.
+    `args` may be the JSON string of a tool call. Raises ToolArgumentError.
+    """
+    validator = TOOL_VALIDATORS.get(tool_name)
+    if validator is None:
+        raise ToolArgumentError(f"Tool '{tool_name}' not found.")
+    if isinstance(args, str):
+        try:
+            args = json.loads(args or "{}")
+        except json.JSONDecodeError:
+            raise ToolArgumentError("Invalid arguments format.") from None
+    return validator(args)
+
+
+@dataclass
+class ToolBatchResult:
+    """Outcome of a batch of tool calls run by dispatch_tool_calls()."""
+
+    results: List[Dict]  # One result per call, in call order
+    committed: bool  # False if the batch was rejected or rolled back
+    message: Optional[str] = None  # Combined message of the applied calls
+
+
+def _snapshot(player: Character) -> Tuple:
+    """Captures what tools can change on a player, for rollback."""
+    return (
+        player.hp,
+        player.stamina,
+        player.money_oz,
+        player.location,
+        player.inventory.copy(),
+        [
+            (item, item.description, item.value, item.quantity)
+            for item in player.inventory
+        ],
+    )
+
+
+def _restore(player: Character, snapshot: Tuple):
+    hp, stamina, money_oz, location, inventory, item_states = snapshot
+    player.hp, player.stamina, player.money_oz = hp, stamina, money_oz
+    player.location = location
+    player.inventory = inventory
+    for item, description, value, quantity in item_states:
+        item.description, item.value, item.quantity = description, value, quantity
+
+
+def dispatch_tool_calls(
+    player: Character, calls: Sequence[Tuple[str, Any]]
+) -> ToolBatchResult:
+    """
+    Validates and runs a batch of (tool_name, args) calls as one transaction on
+    the player: nothing is applied if a call has invalid arguments or raises. Then
+    the player is rolled back and the calls that were not at fault get an error
+    result saying so. A tool that merely reports a miss (success False, e.g. an
+    item that isn't held) keeps its own result and does not undo the rest.
+    """
+    results: List[Optional[Dict]] = [None] * len(calls)
+    validated = []
+    failure = None
+    for index, (tool_name, args) in enumerate(calls):
+        try:
+            validated.append((index, tool_name, validate_tool_call(tool_name, args)))
+        except ToolArgumentError as e:
+            results[index] = {"success": False, "error": str(e)}
+            failure = failure or str(e)
+
+    with tracing.span("tool.batch", calls=len(calls)) as span:
+        if failure is None:
+            snapshot = _snapshot(player)
+            for index, tool_name, args in validated:
+                with tracing.span("tool.execute", tool=tool_name) as tool_span:
+                    try:
+                        result = TOOL_MAPPING[tool_name](player, **args)
+                    except Exception as e:
+                        logger.exception(f"Error executing tool {tool_name}")
+                        result = {"success": False, "error": str(e)}
+                        failure = str(e) or tool_name
+                    tool_span.set_attribute("success", bool(result.get("success")))
+                results[index] = result
+                if failure is not None:
+                    break
+            if failure is not None:
+                _restore(player, snapshot)
+        span.set_attribute("committed", failure is None)
+
+    if failure is not None:
+        logger.warning(f"Tool batch of {len(calls)} calls not applied: {failure}")
+        for index, result in enumerate(results):
+            if result is None or result.get("success"):
+                results[index] = {
+                    "success": False,
+                    "error": (
+                        f"Not applied, another change in the batch failed: {failure}"
+                    ),
+                }
+        return ToolBatchResult(results, committed=False)
+
+    # Misses are reported to the model in their results, not shown as applied changes
+    messages = [
+        result["message"]
+        for result in results
+        if result.get("success") and result.get("message")
+    ]
+    return ToolBatchResult(results, committed=True, message=" ".join(messages) or None)
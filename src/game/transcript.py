@@ -0,0 +1,37 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# The prompt sent to the narrator for a player action; the transcript recovers the
+# action text from it when rebuilding the history.
+ACTION_PROMPT = "The player chose to '{action}'. Describe what happens next."
+_ACTION_PATTERN = re.compile(r"^The player chose to '(.*)'\. Describe what happens next\.$", re.S)
+
+
+def action_from_prompt(content: str) -> Optional[str]:
+    """Returns the player action an action prompt was built from, or None."""
+    match = _ACTION_PATTERN.match(content or "")
+    return match.group(1) if match else None
+
+
+def transcript_entries(messages: Iterable[Dict]) -> List[Dict]:
+    """
+    Groups a message history into displayable turns: {"action", "narrative"}.
+
+    A turn starts at each user message; "action" is the player's action (None for the
+    opening narration) and "narrative" joins the narrator's replies until the next user
+    message. System, summary and tool messages are not shown.
+    """
+    entries = []
+    current = None
+    for msg in messages:
+        role = msg.get("role")
+        if role == "user":
+            current = {"action": action_from_prompt(msg.get("content")), "narrative": ""}
+            entries.append(current)
+        elif role == "assistant" and msg.get("content"):
+            if current is None:
+                current = {"action": None, "narrative": ""}
+                entries.append(current)
+            separator = "\n\n" if current["narrative"] else ""
+            current["narrative"] += separator + msg["content"]
+    return [entry for entry in entries if entry["narrative"] or entry["action"]]
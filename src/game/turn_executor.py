@@ -0,0 +1,184 @@
+import logging
+import queue
+import threading
+from typing import Callable, Iterator, List, Optional
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+
+class Turn:
+    """A single queued player action and its callbacks."""
+
+    def __init__(
+        self,
+        action: str,
+        on_start: Optional[Callable[["Turn"], None]] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        on_complete: Optional[Callable[["Turn"], None]] = None,
+    ):
+        self.action = action
+        self.on_start = on_start
+        self.on_chunk = on_chunk
+        self.on_complete = on_complete
+        self.narrative = ""
+        self.started = False
+        self.cancelled = False
+        self.error: Optional[Exception] = None
+
+    def cancel(self):
+        """Marks the turn as cancelled; it is skipped or aborted at the next chunk."""
+        self.cancelled = True
+
+
+class TurnExecutor:
+    """
+    Runs player turns on a background worker thread, one at a time, in submission order.
+
+    All callbacks are handed to `dispatch`, which must run them on the UI thread
+    (e.g. a queue drained by the Tk main loop via `after`). Streamed turns can be cancelled
+    mid-flight: the narration generator is closed, which aborts the HTTP stream and
+    lets the engine roll the player back.
+
+    State changes the engine extracts in the background (split pipeline) are applied
+    on the worker after each turn, before the next one starts, and their messages
+    are passed to `on_state_changed`.
+    """
+
+    def __init__(
+        self,
+        engine,
+        dispatch: Callable[[Callable[[], None]], None],
+        on_busy_changed: Optional[Callable[[bool, int], None]] = None,
+        on_state_changed: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.engine = engine
+        self.dispatch = dispatch
+        self.on_busy_changed = on_busy_changed
+        self.on_state_changed = on_state_changed
+        self._queue: "queue.Queue[Optional[Turn]]" = queue.Queue()
+        self._current: Optional[Turn] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        logger.info("TurnExecutor started.")
+
+    def submit(
+        self,
+        action: str,
+        on_start: Optional[Callable[[Turn], None]] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        on_complete: Optional[Callable[[Turn], None]] = None,
+    ) -> Turn:
+        """Queues a player action and returns its Turn handle."""
+        turn = Turn(action, on_start, on_chunk, on_complete)
+        with self._lock:
+            self._pending += 1
+            pending = self._pending
+        self._queue.put(turn)
+        logger.debug(f"Queued turn '{action}' ({pending} pending).")
+        self._notify_busy(pending)
+        return turn
+
+    def cancel_current(self) -> bool:
+        """Cancels the in-flight turn, if any. Returns True if a turn was cancelled."""
+        turn = self._current
+        if turn and not turn.cancelled:
+            turn.cancel()
+            logger.info(f"Cancelling in-flight turn '{turn.action}'.")
+            return True
+        return False
+
+    def cancel_all(self):
+        """Cancels the in-flight turn and every queued turn."""
+        self.cancel_current()
+        while True:
+            try:
+                turn = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if turn is not None:
+                turn.cancel()
+                self._finish(turn)
+
+    def is_busy(self) -> bool:
+        """Returns True while a turn is running or queued."""
+        return self._pending > 0
+
+    def shutdown(self, timeout: float = 5.0):
+        """Cancels outstanding work and stops the worker thread."""
+        self.cancel_all()
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        logger.info("TurnExecutor stopped.")
+
+    # --- Worker ---
+
+    def _worker(self):
+        while True:
+            turn = self._queue.get()
+            if turn is None:
+                break
+            if turn.cancelled:
+                self._finish(turn)
+                continue
+
+            self._current = turn
+            turn.started = True
+            if turn.on_start:
+                self.dispatch(lambda t=turn: t.on_start(t))
+            try:
+                self._run_turn(turn)
+            except Exception as e:
+                logger.exception(f"Error running turn '{turn.action}'.")
+                turn.error = e
+            finally:
+                self._current = None
+                self._finish(turn)
+            self._apply_state_changes()
+
+    def _run_turn(self, turn: Turn):
+        chunks = self._turn_chunks(turn.action)
+        parts = []
+        try:
+            for chunk in chunks:
+                if turn.cancelled:
+                    break
+                parts.append(chunk)
+                if turn.on_chunk:
+                    self.dispatch(lambda c=chunk: turn.on_chunk(c))
+        finally:
+            # Closing an unfinished generator aborts the stream and rolls the turn back.
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        turn.narrative = "".join(parts)
+
+    def _turn_chunks(self, action: str) -> Iterator[str]:
+        if config.STREAM_NARRATION:
+            return self.engine.stream_player_action(action)
+        narrative, _ = self.engine.process_player_action(action)
+        return iter([narrative or "..."])
+
+    def _apply_state_changes(self):
+        try:
+            messages = self.engine.apply_state_changes(wait=True)
+        except Exception:
+            logger.exception("Error applying extracted state changes.")
+            return
+        if messages and self.on_state_changed:
+            self.dispatch(lambda: self.on_state_changed(messages))
+
+    def _finish(self, turn: Turn):
+        with self._lock:
+            self._pending -= 1
+            pending = self._pending
+        if turn.on_complete:
+            self.dispatch(lambda: turn.on_complete(turn))
+        self._notify_busy(pending)
+
+    def _notify_busy(self, pending: int):
+        if self.on_busy_changed:
+            self.dispatch(lambda: self.on_busy_changed(pending > 0, pending))
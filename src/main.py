@@ -1,22 +1,42 @@
 #!/usr/bin/env python
 
+import sys
+
+# Installed before anything else is imported so every import is timed
+if "--profile-startup" in sys.argv:
+    from core.startup_profile import StartupProfiler
+
+    startup_profiler = StartupProfiler()
+    startup_profiler.install()
+else:
+    startup_profiler = None
+
+import argparse
 import logging
+import logging.handlers
 import os
-from ui.menu import MainMenuGUI
 from game.engine import GameEngine
-from ui.game_screen import run_game_loop
-from core import config
+from core import config, tracing
 
 if not os.path.exists(config.LOG_DIR):
     os.makedirs(config.LOG_DIR)
 
 LOG_FILE = os.path.join(config.LOG_DIR, "latest.log")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+
+# latest.log is this run's log; earlier runs are rotated to latest.log.1, .2, ...
+# instead of being truncated. Long sessions also rotate once the file gets large.
+log_handler = logging.handlers.RotatingFileHandler(
+    LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT
+)
+if os.path.getsize(LOG_FILE):
+    log_handler.doRollover()
 
 logging.basicConfig(
-    level=logging.DEBUG,  # Capture all debug messages
+    level=config.LOG_LEVEL,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     handlers=[
-        logging.FileHandler(LOG_FILE, mode="w"),  # Log to file
+        log_handler,  # Log to file
         # If you want some level of logging to console uncomment below
         # logging.StreamHandler() # Log to console (stdout) - default level is WARNING
     ],
@@ -30,52 +50,93 @@ logger = logging.getLogger(__name__)
 logger.info("Initialized logger.")
 
 
-def main():
-    """Main function to run the game menu and handle choices."""
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="FrameTale")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Play in the terminal (stdin/stdout) without loading the GUI.",
+    )
+    parser.add_argument(
+        "--script",
+        metavar="FILE",
+        help="Play the actions in FILE (one per line, '-' for stdin) headlessly.",
+    )
+    parser.add_argument(
+        "--slot", metavar="SLOT_ID", help="Save slot to load in headless mode."
+    )
+    parser.add_argument(
+        "--new",
+        action="store_true",
+        help="Start a new game in headless mode instead of continuing.",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print startup milestones and import timings to stderr.",
+    )
+    return parser.parse_args(argv)
+
+
+def main_headless(args: argparse.Namespace) -> int:
+    """Runs the game without any UI modules (and without customtkinter/Tk)."""
+    from cli import run_headless
+
     engine = GameEngine()
+    if startup_profiler:
+        startup_profiler.mark("engine ready")
+        startup_profiler.report()
     try:
-        menu = MainMenuGUI()
-        choice = menu.get_choice()
-
-        if choice == "1":
-            logger.info("Starting new game...")
-            print("\n🧭 Loading...")
-            engine.start_new_game()
-            if engine.save_game():
-                logger.debug("Saved game state after initial narrative.")
-            else:
-                logger.warning("Failed to save initial game state.")
-
-            if engine.game_state.is_initialized():
-                run_game_loop(engine)
-            else:
-                logger.error("Engine state not initialized after start_new_game.")
-                print("Failed to initialize new game state. Returning to menu.")
-
-        elif choice == "2":
-            logger.info("Attempting to continue game...")
-            if engine.load_game():
-                logger.info("Loaded game state successfully.")
-                run_game_loop(engine)
-            else:
-                logger.warning(
-                    "Could not load game. No save file found or file is invalid."
-                )
-                print("\nNo game save available.")
-
-        elif choice == "3":
-            print("Exiting game. Goodbye!")
-            # No break needed as there's no loop
+        return run_headless(
+            engine, script=args.script, slot_id=args.slot, new_game=args.new
+        )
+    except KeyboardInterrupt:
+        logger.info("Game interrupted by user (Ctrl+C). Exiting gracefully.")
+        print("\nExiting game. Goodbye!")
+        return 0
+    finally:
+        engine.close()
+
+
+def main():
+    """Main function to run the game window, starting at the main menu."""
+    # The GUI modules pull in customtkinter/Tk, so they're only imported here
+    from ui.app import run_app
 
+    if startup_profiler:
+        startup_profiler.mark("ui modules imported")
+
+    def on_ready():
+        if startup_profiler:
+            startup_profiler.mark("menu on screen")
+            startup_profiler.report()
+
+    engine = GameEngine()
+    try:
+        run_app(engine, on_ready=on_ready)
     except KeyboardInterrupt:
         logger.info("Game interrupted by user (Ctrl+C). Exiting gracefully.")
         print("\nExiting game. Goodbye!")
+    finally:
+        # Make sure queued autosaves reach the disk before the process exits
+        engine.close()
 
 
 if __name__ == "__main__":
     logger.info("Starting game application.")
+    if startup_profiler:
+        startup_profiler.mark("modules imported")
+    args = parse_args()
+    tracing.configure()
+    exit_code = 0
     try:
-        main()
+        if args.headless or args.script:
+            exit_code = main_headless(args)
+        else:
+            main()
     except Exception as e:
         logger.exception("An unhandled exception occurred.")
+        exit_code = 1
+    tracing.shutdown()
     logger.info("Exiting game application.")
+    sys.exit(exit_code)
@@ -1,76 +1,149 @@
 # services/ai_narrator.py
 
-import requests
 import json
 import logging
-from typing import List, Dict, Tuple
+import time
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Generator
 
 from core.models import Character
-from core import config
-from game.tools import TOOL_MAPPING, tools
+from core import config, tracing
+from core.usage import NARRATION, TOOL_ITERATION, UsageLedger
+from game.tools import ToolBatchResult, dispatch_tool_calls, tools
+from game.state_block import (
+    StateBlockFilter,
+    parse_state_changes,
+    split_state_block,
+    structured_turn_instructions,
+)
+from game.message_log import MessageLog
+from services.summarizer import summarize_old_messages
+from services.context_window import ContextWindow, estimate_messages_tokens
+from services.message_layout import add_cache_control, build_request_messages
+from services.transport import TransportError, get_transport
 
 logger = logging.getLogger(__name__)
 
+MAX_ITERATIONS_MESSAGE = "[italic yellow]>> The story seems paused after complex actions. Please provide your next action.[/italic yellow]\n"
 
-def _prepare_system_messages(messages: List[Dict]) -> List[Dict]:
-    """Prepares and adds initial system messages to the message history, keeping all but the last two."""
-    starting_prompt_content = config.STARTING_PROMPT.format(
+
+@lru_cache(maxsize=1)
+def _starting_prompt() -> str:
+    """Formats the starting system prompt once; it must stay byte-identical across turns."""
+    return config.STARTING_PROMPT.format(
         debug_password=config.DEBUG_PASSWORD, story=config.STORY
     )
 
+
+def _prepare_system_messages(messages: List[Dict]) -> MessageLog:
+    """
+    Prepares the message history for a new turn: ensures the starting system prompt
+    is present and drops the last two system messages (the previous turn's player
+    state and reminder), keeping all earlier system messages.
+    """
+    if not isinstance(messages, MessageLog):
+        messages = MessageLog(messages)
+
     # Ensure the initial system message is always present if the history is empty
-    if not any(msg.get("role") == "system" for msg in messages):
-        messages.insert(0, {"role": "system", "content": starting_prompt_content})
+    if not messages.role_count("system"):
+        messages.insert(0, {"role": "system", "content": _starting_prompt()})
 
-    system_messages = [msg for msg in messages if msg.get("role") == "system"]
-    other_messages = [msg for msg in messages if msg.get("role") != "system"]
+    # Keep all system messages except the last two (found via the role index, near the tail)
+    if messages.role_count("system") > 2:
+        for index in reversed(messages.last_role_indexes("system", 2)):
+            del messages[index]
 
-    # Keep all system messages except the last two
-    system_messages_to_keep = (
-        system_messages[:-2] if len(system_messages) > 2 else system_messages
-    )
+    return messages
 
-    # Reconstruct the messages list with the filtered system messages
-    messages_to_keep = []
-    system_index = 0
-    other_index = 0
-
-    # Merge messages back in their original relative order
-    for msg in messages:
-        if msg.get("role") == "system":
-            if system_index < len(system_messages_to_keep):
-                messages_to_keep.append(system_messages_to_keep[system_index])
-                system_index += 1
-        else:
-            if other_index < len(other_messages):
-                messages_to_keep.append(other_messages[other_index])
-                other_index += 1
 
-    return messages_to_keep
+def describe_player(player: Character) -> str:
+    """Describes the player's state in one line, as given to the models."""
+    return f"Player: HP={player.hp}, Stamina={player.stamina}, Money={player.money_oz:.2f}, Location='{player.location}', Inventory=[{', '.join(player.inventory.names()) if player.inventory else 'Empty'}]"
 
 
 def _prepare_player_state_message(player: Character) -> Dict:
     """Prepares the player state message."""
-    player_state_content = f"Player: HP={player.hp}, Stamina={player.stamina}, Money={player.money_oz:.2f}, Location='{player.location}', Inventory=[{', '.join(item.name for item in player.inventory) if player.inventory else 'Empty'}]"
-    return {"role": "system", "content": player_state_content}
+    return {"role": "system", "content": describe_player(player)}
 
 
-def _call_ai_api(messages: List[Dict]) -> Dict:
-    """Calls the AI API and returns the response data."""
+def _structured_turns() -> bool:
+    """True if the narrator returns state changes as a state block."""
+    # With the split pipeline the narrator only tells the story
+    return config.STRUCTURED_TURNS and not config.SPLIT_TOOL_PIPELINE
+
+
+def _request_messages(messages: List[Dict]) -> List[Dict]:
+    """Builds the message list sent to the narration model from the stored history."""
+    with tracing.span("narrator.build_request", history_messages=len(messages)) as span:
+        # Reordering keeps every message, so the history's (running) total applies
+        total = estimate_messages_tokens(messages)
+        if config.PREFIX_STABLE_MESSAGES:
+            messages = build_request_messages(messages)
+        messages = ContextWindow(config.NARRATION_MODEL).fit(messages, total)
+        if config.PREFIX_STABLE_MESSAGES and config.PROMPT_CACHE_CONTROL:
+            messages = add_cache_control(messages)
+        span.set_attribute("request_messages", len(messages))
+    return messages
+
+
+def _narration_payload(messages: List[Dict]) -> Dict:
+    """Builds the narration request; tools are left out with the split pipeline."""
     payload = {
         "model": config.NARRATION_MODEL,
-        "messages": messages,
-        "tools": tools,
-        "tool_choice": "auto",
-    }
-    headers = {
-        "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
+        "messages": _request_messages(messages),
+        "usage": {"include": True},  # Ask OpenRouter to report the call's cost
     }
+    if not config.SPLIT_TOOL_PIPELINE:
+        payload["tools"] = tools
+        payload["tool_choice"] = "auto"
+    return payload
+
+
+def _call_ai_api(messages: List[Dict]) -> Dict:
+    """Calls the AI API and returns the response data."""
+    payload = _narration_payload(messages)
+    with tracing.span("llm.request", model=config.NARRATION_MODEL, stream=False) as span:
+        response_data = get_transport().chat_completion(payload)
+        span.set_attributes(tracing.usage_attributes(response_data.get("usage")))
+    return response_data
+
+
+def apply_tool_calls(
+    player: Character,
+    calls: List[Tuple[str, object]],
+    tool_messages_this_turn: List[str],
+) -> ToolBatchResult:
+    """
+    Runs a turn's (tool_name, args) calls as one batch against the player and
+    collects the combined message for display.
+    """
+    logger.info(f"Executing {len(calls)} tool calls: {[name for name, _ in calls]}")
+    batch = dispatch_tool_calls(player, calls)
+    if batch.message:
+        tool_messages_this_turn.append(
+            f"[italic yellow]>> {batch.message}[/italic yellow]\n"
+        )
+    return batch
+
+
+def _apply_state_block(
+    player: Character, response_message: Dict, tool_messages_this_turn: List[str]
+) -> bool:
+    """
+    Applies the state changes of a structured reply (as one batch) and strips the
+    block from its content. Returns True if a block was found.
+    """
+    narrative, body = split_state_block(response_message.get("content") or "")
+    if body is None:
+        return False
+    response_message["content"] = narrative
 
-    response = requests.post(config.OPENROUTER_API_URL, headers=headers, json=payload)
-    response.raise_for_status()
-    return response.json()
+    changes, errors = parse_state_changes(body)
+    for error in errors:
+        logger.warning(f"Rejected state change: {error}")
+    if changes:
+        apply_tool_calls(player, changes, tool_messages_this_turn)
+    return True
 
 
 def _process_ai_response(
@@ -107,84 +180,81 @@ def _process_ai_response(
     ):
         response_message["content"] = ""
 
+    if _structured_turns():
+        if response_message.get("tool_calls"):
+            # The model fell back to tool calls; those carry the state changes
+            response_message["content"] = (
+                split_state_block(response_message.get("content") or "")[0] or None
+            )
+        elif not _apply_state_block(player, response_message, tool_messages_this_turn):
+            logger.info("Structured reply without a state block; no state changes.")
+
     messages.append(response_message)
 
     if response_message.get("tool_calls"):
         logger.info("Tool call requested by LLM.")
-        for tool_call in response_message["tool_calls"]:
-            tool_name = tool_call["function"]["name"]
-            tool_id = tool_call["id"]
-            try:
-                tool_args = json.loads(tool_call["function"]["arguments"])
-                logger.info(f"Executing tool: {tool_name} with args: {tool_args}")
-
-                if tool_name in TOOL_MAPPING:
-                    tool_function = TOOL_MAPPING[tool_name]
-                    tool_result = tool_function(player, **tool_args)
-                    logger.info(f"Tool {tool_name} executed. Result: {tool_result}")
-
-                    if tool_result.get("success") and tool_result.get("message"):
-                        tool_messages_this_turn.append(
-                            f"[italic yellow]>> {tool_result['message']}[/italic yellow]\n"
-                        )
-
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": tool_id,
-                            "name": tool_name,
-                            "content": json.dumps(tool_result),
-                        }
-                    )
-                else:
-                    logger.error(f"Unknown tool requested: {tool_name}")
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": tool_id,
-                            "name": tool_name,
-                            "content": json.dumps(
-                                {
-                                    "success": False,
-                                    "error": f"Tool '{tool_name}' not found.",
-                                }
-                            ),
-                        }
-                    )
-            except json.JSONDecodeError:
-                logger.error(
-                    f"Failed to decode arguments for tool {tool_name}: {tool_call['function']['arguments']}"
-                )
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_id,
-                        "name": tool_name,
-                        "content": json.dumps(
-                            {"success": False, "error": "Invalid arguments format."}
-                        ),
-                    }
-                )
-            except Exception as tool_exc:
-                logger.exception(f"Error executing tool {tool_name}")
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_id,
-                        "name": tool_name,
-                        "content": json.dumps(
-                            {"success": False, "error": str(tool_exc)}
-                        ),
-                    }
-                )
+        tool_calls = response_message["tool_calls"]
+        batch = apply_tool_calls(
+            player,
+            [
+                (tool_call["function"]["name"], tool_call["function"]["arguments"])
+                for tool_call in tool_calls
+            ],
+            tool_messages_this_turn,
+        )
+        # Every tool call needs its own result message
+        for tool_call, tool_result in zip(tool_calls, batch.results):
+            messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "content": json.dumps(tool_result),
+                }
+            )
         return True, ""  # Tool calls were made, continue loop
     else:
         logger.info("No tool calls requested. Yielding content from current response.")
         return False, response_message.get("content", "")
 
 
-def get_ai_narrative(
+def _log_last_messages(messages: List[Dict]):
+    """Logs the last two request messages at DEBUG level (skipped entirely otherwise)."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Messages sent (last 2): {json.dumps(messages[-2:])}")
+
+
+def _prepare_turn_messages(
     player: Character, prompt: str, messages: List[Dict]
+) -> List[Dict]:
+    """Builds the message list for a new turn: system prompts, player state, reminder and prompt."""
+    with tracing.span("narrator.prepare_messages", history_messages=len(messages)):
+        messages = _prepare_system_messages(messages)
+        messages.append(_prepare_player_state_message(player))
+        reminder = config.REMINDER_MESSAGE
+        if config.SPLIT_TOOL_PIPELINE:
+            reminder = config.NARRATION_REMINDER_MESSAGE
+        elif config.STRUCTURED_TURNS:
+            # One message, so it is still dropped with the player state next turn
+            reminder = f"{reminder}\n\n{structured_turn_instructions()}"
+        messages.append({"role": "system", "content": reminder})
+        messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _record_usage(usage: Optional[UsageLedger], iteration: int, response_data: Dict):
+    """Accounts a narration call: the first of a turn, or a tool-loop follow-up."""
+    if usage is not None:
+        call_type = NARRATION if iteration == 1 else TOOL_ITERATION
+        usage.record(call_type, config.NARRATION_MODEL, response_data.get("usage"))
+
+
+def get_ai_narrative(
+    player: Character,
+    prompt: str,
+    messages: List[Dict],
+    summarize: bool = True,
+    usage: Optional[UsageLedger] = None,
 ) -> Tuple[str, List[Dict]]:
     """
     Generates narrative using the configured AI API, handling tool calls,
@@ -194,6 +264,9 @@ def get_ai_narrative(
         player: The current player character object.
         prompt: The user's input or the initial prompt.
         messages: The existing message history (will be modified in place).
+        summarize: Summarize old messages inline before narrating. Disable when
+            summarization is handled in the background by the caller.
+        usage: Ledger the token usage of every API call is added to.
 
     Returns:
         A tuple containing:
@@ -206,101 +279,27 @@ def get_ai_narrative(
             messages,
         )
 
-    messages = _prepare_system_messages(messages)
-    messages.append(_prepare_player_state_message(player))
-    messages.append({"role": "system", "content": config.REMINDER_MESSAGE})
-    messages.append({"role": "user", "content": prompt})
+    messages = _prepare_turn_messages(player, prompt, messages)
 
     iteration = 0
     tool_messages_this_turn = []
 
     try:
-        # Summarization logic
-        summarization_chunk_size = 5
-        unsummarized_message_limit = 10
-        user_assistant_messages = [
-            msg for msg in messages if msg.get("role") in ["user", "assistant"]
-        ]
-        if len(user_assistant_messages) > unsummarized_message_limit:
-            # Take more to have overlap with summaries (to not miss anything at the edge of transcripts).
-            messages_to_summarize = user_assistant_messages[
-                : (summarization_chunk_size + 2)
-            ]
-            summary_prompt = "This is an RPG roleplay transcript of a User (player) and an Assistant (dungeon master). Please write most important facts in a list like this:\nUser saw a giant old building.\nThe building had a familiar graffiti.\nUser went into the building.\nThe giant rat inside the house lunged at him.\n\n---\nDon't say anything else, just list. Be very brief like the examples I showed. Don't use any symbols. List items are separated by new lines only. Here's the transcript:\n\n"
-            for msg in messages_to_summarize:
-                summary_prompt += (
-                    f"{msg.get('role').capitalize()}: {msg.get('content', '')}\n"
-                )
-
-            try:
-                # Call the AI API for summarization
-                summary_payload = {
-                    "model": config.SUMMARIZATION_MODEL,
-                    "messages": [{"role": "user", "content": summary_prompt}],
-                }
-                summary_headers = {
-                    "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                }
-                summary_response = requests.post(
-                    config.OPENROUTER_API_URL,
-                    headers=summary_headers,
-                    json=summary_payload,
-                )
-                summary_response.raise_for_status()
-                summary_data = summary_response.json()
-                summary_content = summary_data["choices"][0]["message"]["content"]
-
-                # Find the indices of the messages to remove from the original messages list
-                original_indices_to_remove = []
-                user_assistant_count = 0
-                for i, msg in enumerate(messages):
-                    if (
-                        msg.get("role") in ["user", "assistant"]
-                        and user_assistant_count < summarization_chunk_size
-                    ):
-                        original_indices_to_remove.append(i)
-                        user_assistant_count += 1
-                    if user_assistant_count == summarization_chunk_size:
-                        break
-
-                # Remove original messages in reverse order to avoid index issues
-                for index in sorted(original_indices_to_remove, reverse=True):
-                    messages.pop(index)  # 123
-
-                # Insert the summary message at the position of the first removed message
-                insert_index = (
-                    original_indices_to_remove[0] if original_indices_to_remove else 0
-                )
-                messages.insert(
-                    insert_index,
-                    {
-                        "role": "system",
-                        "content": f"Summary: {summary_content.strip()}",
-                    },
-                )
-                logger.info(
-                    f"Summarized first {user_assistant_count} user/assistant messages using LLM."
-                )
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error calling AI API for summarization: {e}")
-                # Continue without summarization if API call fails
-            except Exception as e:
-                logger.exception("Error during summarization.")
-                # Continue without summarization if summarization fails
+        if summarize:
+            messages = summarize_old_messages(messages, usage=usage)
 
         while iteration < config.MAX_TOOL_ITERATIONS:
             iteration += 1
             logger.debug(f"--- AI Call Iteration {iteration} ---")
-            logger.debug(
-                f"Messages sent (last 2): {json.dumps(messages[-2:], indent=2)}"
-            )
+            _log_last_messages(messages)
 
-            response_data = _call_ai_api(messages)
-            tool_calls_made, final_content = _process_ai_response(
-                player, response_data, messages, tool_messages_this_turn
-            )
+            with tracing.span("narrator.iteration", iteration=iteration) as span:
+                response_data = _call_ai_api(messages)
+                _record_usage(usage, iteration, response_data)
+                tool_calls_made, final_content = _process_ai_response(
+                    player, response_data, messages, tool_messages_this_turn
+                )
+                span.set_attribute("tool_calls", tool_calls_made)
 
             if not tool_calls_made:
                 final_narrative = (
@@ -324,11 +323,11 @@ def get_ai_narrative(
             final_narrative = (
                 "\n".join(tool_messages_this_turn)
                 if tool_messages_this_turn
-                else "[italic yellow]>> The story seems paused after complex actions. Please provide your next action.[/italic yellow]\n"
+                else MAX_ITERATIONS_MESSAGE
             )
             return final_narrative, messages
 
-    except requests.exceptions.RequestException as e:
+    except TransportError as e:
         error_message = f"Error calling AI API: {e}"
         logger.error(error_message)
         return (
@@ -339,3 +338,150 @@ def get_ai_narrative(
         error_message = f"Error in AI narrative generation: {e}"
         logger.exception("Error in AI narrative generation.")
         return f"[bold red]Error processing AI narrative: {e}[/bold red]\n", messages
+
+
+def _stream_ai_api(messages: List[Dict]) -> Generator[str, None, Dict]:
+    """
+    Calls the AI API in streaming mode, yielding content chunks as they arrive.
+
+    Streamed tool_calls deltas are accumulated by index. When the stream ends the
+    assembled message is returned in the same shape as a non-streaming response,
+    so it can be handed to _process_ai_response.
+    """
+    payload = _narration_payload(messages)
+    content_parts = []
+    tool_calls = {}
+    usage = None
+
+
+    with tracing.span("llm.request", model=config.NARRATION_MODEL, stream=True) as span:
+        started = time.perf_counter()
+        for event in get_transport().stream_chat_completion(payload):
+            if event.get("error"):
+                raise RuntimeError(f"AI stream error: {event['error']}")
+            # The usage object arrives with the last chunk
+            usage = event.get("usage") or usage
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta") or {}
+
+            text = delta.get("content")
+            if text:
+                if not content_parts:
+                    span.set_attribute(
+                        "llm.first_chunk_ms", (time.perf_counter() - started) * 1000
+                    )
+                content_parts.append(text)
+                yield text
+
+            for tool_call_delta in delta.get("tool_calls") or []:
+                index = tool_call_delta.get("index", len(tool_calls))
+                tool_call = tool_calls.setdefault(
+                    index,
+                    {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+                )
+                if tool_call_delta.get("id"):
+                    tool_call["id"] = tool_call_delta["id"]
+                function_delta = tool_call_delta.get("function") or {}
+                if function_delta.get("name"):
+                    tool_call["function"]["name"] += function_delta["name"]
+                if function_delta.get("arguments"):
+                    tool_call["function"]["arguments"] += function_delta["arguments"]
+        span.set_attributes(tracing.usage_attributes(usage))
+
+    message = {"role": "assistant", "content": "".join(content_parts) or None}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+    response_data = {"choices": [{"message": message}]}
+    if usage:
+        response_data["usage"] = usage
+    return response_data
+
+
+def stream_ai_narrative(
+    player: Character,
+    prompt: str,
+    messages: List[Dict],
+    summarize: bool = True,
+    usage: Optional[UsageLedger] = None,
+) -> Generator[str, None, Tuple[str, List[Dict]]]:
+    """
+    Streaming counterpart of get_ai_narrative.
+
+    Yields narrative text chunks (and tool result messages) as soon as they are
+    available. When exhausted, the generator returns the same
+    (narrative, updated_messages) tuple as get_ai_narrative via StopIteration.value.
+    """
+    if not config.is_ai_available():
+        unavailable_message = (
+            "[red]AI Narrator is unavailable due to missing API key.[/red]\n"
+        )
+        yield unavailable_message
+        return unavailable_message, messages
+
+    messages = _prepare_turn_messages(player, prompt, messages)
+
+    tool_messages_this_turn = []
+    shown_parts = []
+
+    try:
+        if summarize:
+            messages = summarize_old_messages(messages, usage=usage)
+
+        for iteration in range(1, config.MAX_TOOL_ITERATIONS + 1):
+            logger.debug(f"--- AI Stream Iteration {iteration} ---")
+            _log_last_messages(messages)
+
+            with tracing.span("narrator.iteration", iteration=iteration) as span:
+                stream = _stream_ai_api(messages)
+                # The state block of a structured reply is applied, not shown
+                block_filter = StateBlockFilter() if _structured_turns() else None
+                while True:
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as stop:
+                        response_data = stop.value
+                        chunk = block_filter.finish() if block_filter else ""
+                        if chunk:
+                            shown_parts.append(chunk)
+                            yield chunk
+                        break
+                    if block_filter:
+                        chunk = block_filter.feed(chunk)
+                        if not chunk:
+                            continue
+                    shown_parts.append(chunk)
+                    yield chunk
+                _record_usage(usage, iteration, response_data)
+
+                tool_messages_before = len(tool_messages_this_turn)
+                tool_calls_made, _ = _process_ai_response(
+                    player, response_data, messages, tool_messages_this_turn
+                )
+                span.set_attribute("tool_calls", tool_calls_made)
+            for tool_message in tool_messages_this_turn[tool_messages_before:]:
+                shown_parts.append(tool_message)
+                yield tool_message
+
+            if not tool_calls_made:
+                return "".join(shown_parts), messages
+
+        logger.warning(f"Max tool iterations ({config.MAX_TOOL_ITERATIONS}) reached.")
+        if not shown_parts:
+            shown_parts.append(MAX_ITERATIONS_MESSAGE)
+            yield MAX_ITERATIONS_MESSAGE
+        return "".join(shown_parts), messages
+
+    except TransportError as e:
+        logger.error(f"Error calling AI API: {e}")
+        error_message = (
+            f"[bold red]Error communicating with AI Narrator: {e}[/bold red]\n"
+        )
+    except Exception as e:
+        logger.exception("Error in AI narrative generation.")
+        error_message = f"[bold red]Error processing AI narrative: {e}[/bold red]\n"
+
+    shown_parts.append(error_message)
+    yield error_message
+    return "".join(shown_parts), messages
@@ -0,0 +1,179 @@
+# services/context_window.py
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from core import config
+from core.tokens import estimate_message_tokens
+from game.message_log import MessageLog
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary: "
+
+
+def estimate_messages_tokens(messages: List[Dict]) -> int:
+    """Estimates tokens for a list of chat messages (O(1) for a MessageLog)."""
+    if isinstance(messages, MessageLog):
+        return messages.token_total
+    return sum(estimate_message_tokens(msg) for msg in messages)
+
+
+def system_indexes(messages: List[Dict]) -> List[int]:
+    """Returns the positions of the system messages (via the index of a MessageLog)."""
+    if isinstance(messages, MessageLog):
+        return messages.role_indexes("system")
+    return [i for i, msg in enumerate(messages) if msg.get("role") == "system"]
+
+
+def is_summary(message: Dict) -> bool:
+    """Checks if a message is a summary system message."""
+    return message.get("role") == "system" and (message.get("content") or "").startswith(
+        SUMMARY_PREFIX
+    )
+
+
+def get_token_budget(model: str) -> int:
+    """Returns the prompt token budget configured for a model."""
+    return config.CONTEXT_TOKEN_BUDGETS.get(model, config.DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+class ContextWindow:
+    """
+    Keeps the prompt for a model within a token budget.
+
+    Once the history passes `summarize_at` of the budget, the oldest conversation
+    messages are picked for summarization until it would drop back to `summarize_to`.
+    When summaries pile up they are merged into a single higher-level summary.
+    fit() is the hard cap applied to each outgoing request.
+    """
+
+    def __init__(self, model: str = None, budget: int = None):
+        self.model = model or config.NARRATION_MODEL
+        self.budget = budget or get_token_budget(self.model)
+        self.summarize_at = int(self.budget * config.CONTEXT_SUMMARIZE_AT)
+        self.summarize_to = int(self.budget * config.CONTEXT_SUMMARIZE_TO)
+
+    def select_messages_to_summarize(self, messages: List[Dict]) -> Optional[List[Dict]]:
+        """
+        Returns the oldest conversation messages that should be folded into a summary,
+        or None if the history is within budget. The most recent
+        config.CONTEXT_KEEP_RECENT_MESSAGES conversation messages are never selected,
+        and an assistant tool call is never separated from its tool results.
+        """
+        total = estimate_messages_tokens(messages)
+        if total <= self.summarize_at:
+            return None
+
+        # Walk the conversation from the oldest message and stop as soon as the chunk
+        # is complete, so only the head of the history is visited
+        conversation_count = len(messages) - len(system_indexes(messages))
+        keep = config.CONTEXT_KEEP_RECENT_MESSAGES
+        candidate_count = max(conversation_count - keep, 0)
+        if not candidate_count:
+            return None
+
+        to_free = total - self.summarize_to
+        chunk = []
+        freed = 0
+        following = None  # The first conversation message after the chunk
+        conversation = (msg for msg in messages if msg.get("role") != "system")
+        for position, msg in enumerate(conversation):
+            # Never split a tool call from its results
+            done = bool(chunk) and freed >= to_free and msg.get("role") != "tool"
+            if position >= candidate_count or done:
+                following = msg
+                break
+            chunk.append(msg)
+            freed += estimate_message_tokens(msg)
+
+        # If some of a tool call's results fell outside the candidates, the chunk ends
+        # inside that tool run: trim it back to before the call that started it
+        if following is not None and following.get("role") == "tool":
+            while chunk and not chunk.pop().get("tool_calls"):
+                pass
+        # Drop a trailing tool call whose results fell outside the candidates
+        while chunk and chunk[-1].get("tool_calls"):
+            chunk.pop()
+        if not any(msg.get("role") in ["user", "assistant"] for msg in chunk):
+            return None
+        return chunk
+
+    def select_summaries_to_merge(self, messages: List[Dict]) -> Optional[List[Dict]]:
+        """Returns the oldest summaries to collapse into one, if there are too many."""
+        summaries = [
+            messages[i] for i in system_indexes(messages) if is_summary(messages[i])
+        ]
+        if len(summaries) <= config.CONTEXT_MAX_SUMMARIES:
+            return None
+        return summaries[: len(summaries) - config.CONTEXT_MAX_SUMMARIES + 1]
+
+    def fit(self, messages: List[Dict], total: Optional[int] = None) -> List[Dict]:
+        """
+        Returns the messages to send, dropping the oldest history if it exceeds the budget.
+
+        The starting system prompt and everything from the latest user message on are
+        always kept. Older conversation messages are dropped first, then the oldest
+        summaries. The stored history is not modified. `total` is the token estimate
+        of the messages if already known (e.g. from the MessageLog they were laid out
+        from), which makes the common within-budget case O(1).
+        """
+        if total is None:
+            total = estimate_messages_tokens(messages)
+        if total <= self.budget:
+            return messages
+
+        last_user_index = max(
+            (i for i, msg in enumerate(messages) if msg.get("role") == "user"),
+            default=len(messages),
+        )
+        protected = {0} | set(range(last_user_index, len(messages)))
+
+        droppable = [i for i in range(len(messages)) if i not in protected]
+        # Conversation first, summaries and other system messages last (oldest first)
+        droppable.sort(key=lambda i: (messages[i].get("role") == "system", i))
+
+        dropped = set()
+        for i in droppable:
+            if total <= self.budget:
+                break
+            dropped.add(i)
+            total -= estimate_message_tokens(messages[i])
+
+        fitted = [msg for i, msg in enumerate(messages) if i not in dropped]
+        # Tool results must follow their tool call; drop any orphans left behind
+        result = []
+        for msg in fitted:
+            if msg.get("role") == "tool" and not (
+                result and (result[-1].get("tool_calls") or result[-1].get("role") == "tool")
+            ):
+                continue
+            result.append(msg)
+
+        logger.warning(
+            f"Prompt over budget ({self.budget} tokens); dropped {len(messages) - len(result)} old messages."
+        )
+        return result
+
+
+def render_transcript(messages: List[Dict]) -> str:
+    """Renders messages as a plain transcript for summarization prompts."""
+    lines = []
+    for msg in messages:
+        role = msg.get("role", "")
+        content = msg.get("content") or ""
+        if is_summary(msg):
+            content = content[len(SUMMARY_PREFIX) :]
+        elif msg.get("tool_calls"):
+            content = content or ", ".join(
+                f"{tc['function']['name']}({tc['function'].get('arguments', '')})"
+                for tc in msg["tool_calls"]
+            )
+        elif role == "tool":
+            try:
+                content = json.loads(content).get("message", content)
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        lines.append(f"{role.capitalize()}: {content}")
+    return "\n".join(lines) + "\n"
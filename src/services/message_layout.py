@@ -0,0 +1,105 @@
+# services/message_layout.py
+
+import logging
+from typing import Dict, List
+
+from game.message_log import MessageLog
+from services.context_window import is_summary, system_indexes
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _current_turn_start(messages: List[Dict]) -> int:
+    """Returns the index of the latest user message (the start of the current turn)."""
+    if isinstance(messages, MessageLog):
+        last_user = messages.last_role_indexes("user")
+        return last_user[0] if last_user else len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            return i
+    return len(messages)
+
+
+def build_request_messages(messages: List[Dict]) -> List[Dict]:
+    """
+    Reorders the stored history into a prefix-stable layout for the API request:
+
+        starting prompt, summaries (oldest first), earlier conversation,
+        player state / reminder, current turn (latest user message onwards)
+
+    Everything before the volatile system messages only changes when a summary is
+    spliced in, so consecutive requests share a byte-identical prefix that
+    provider-side prompt caches can reuse. The stored history is not modified.
+
+    Only the system messages are visited (through the role index of a MessageLog);
+    the conversation between them is copied as slices.
+    """
+    turn_start = _current_turn_start(messages)
+
+    head = []
+    summaries = []
+    volatile = []
+    conversation = []
+    previous = -1
+    for i in system_indexes(messages):
+        if i >= turn_start:
+            break
+        conversation.extend(messages[previous + 1 : i])
+        previous = i
+        msg = messages[i]
+        if i == 0 and not is_summary(msg):
+            head.append(msg)
+        elif is_summary(msg):
+            summaries.append(msg)
+        else:
+            volatile.append(msg)
+    conversation.extend(messages[previous + 1 : turn_start])
+
+    return head + summaries + conversation + volatile + messages[turn_start:]
+
+
+def _with_cache_control(message: Dict) -> Dict:
+    marked = dict(message)
+    marked["content"] = [
+        {"type": "text", "text": message["content"], "cache_control": CACHE_CONTROL}
+    ]
+    return marked
+
+
+def _can_mark(message: Dict) -> bool:
+    content = message.get("content")
+    return message.get("role") in ["system", "user", "assistant"] and bool(
+        content and isinstance(content, str)
+    )
+
+
+def add_cache_control(messages: List[Dict]) -> List[Dict]:
+    """
+    Marks cache breakpoints on a prefix-stable request: the end of the leading system
+    block (starting prompt + summaries) and the last message of the earlier
+    conversation. Providers that support `cache_control` (e.g. Anthropic and Gemini
+    via OpenRouter) cache up to those points; others ignore the markers.
+    """
+    breakpoints = []
+
+    leading_end = 0
+    while leading_end < len(messages) and messages[leading_end].get("role") == "system":
+        leading_end += 1
+    if leading_end:
+        breakpoints.append(leading_end - 1)
+
+    # The last earlier-conversation message, just before this turn's volatile system messages
+    turn_start = _current_turn_start(messages)
+    i = turn_start - 1
+    while i >= leading_end and messages[i].get("role") == "system":
+        i -= 1
+    if i >= leading_end:
+        breakpoints.append(i)
+
+    marked = list(messages)
+    for i in breakpoints:
+        if _can_mark(marked[i]):
+            marked[i] = _with_cache_control(marked[i])
+    return marked
@@ -0,0 +1,143 @@
+# services/state_extractor.py
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from core import config, tracing
+from core.models import Character
+from core.usage import EXTRACTION, UsageLedger
+from game.tools import tools
+from services.ai_narrator import apply_tool_calls
+from services.transport import TransportError, get_transport
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_PROMPT = "You keep track of the player's state in a text RPG. You get the player's current state, the action they took and the narrator's reply. Call the tools for every change to the player the reply describes: items picked up, dropped or changed, damage or healing, effort or rest, money gained or spent. Only record what actually happened in the reply. If nothing changed, call no tools. Don't write anything else."
+
+
+def request_state_changes(
+    player_state: str,
+    action: Optional[str],
+    narrative: str,
+    usage: Optional[UsageLedger] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Asks the tool model which state changes a turn's narrative implies. Returns
+    the (tool_name, arguments) of its tool calls; they are validated on dispatch.
+    """
+    payload = {
+        "model": config.TOOL_MODEL,
+        "messages": [
+            {"role": "system", "content": EXTRACTION_PROMPT},
+            {
+                "role": "user",
+                "content": (
+                    f"{player_state}\n"
+                    f"Action: {action or '(start of the story)'}\n"
+                    f"Narrator: {narrative}"
+                ),
+            },
+        ],
+        "tools": tools,
+        "tool_choice": "auto",
+        "usage": {"include": True},
+    }
+    with tracing.span(
+        "llm.request", model=config.TOOL_MODEL, stream=False, kind="extraction"
+    ) as span:
+        response_data = get_transport().chat_completion(payload)
+        span.set_attributes(tracing.usage_attributes(response_data.get("usage")))
+    if usage is not None:
+        usage.record(EXTRACTION, config.TOOL_MODEL, response_data.get("usage"))
+
+    message = response_data["choices"][0]["message"]
+    return [
+        (tool_call["function"]["name"], tool_call["function"]["arguments"])
+        for tool_call in message.get("tool_calls") or []
+    ]
+
+
+class BackgroundStateExtractor:
+    """
+    Extracts state changes with the tool model after each turn, off its critical path.
+
+    schedule() is called once a turn's narrative is complete and starts the
+    extraction request in the background. apply_pending() applies finished
+    extractions to the player on the caller's thread (the one that owns the game
+    state), oldest first, and returns their messages for display. The engine
+    applies them before the next turn and before saving.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="state-extractor"
+        )
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+
+    def schedule(
+        self,
+        player_state: str,
+        action: Optional[str],
+        narrative: str,
+        usage: Optional[UsageLedger] = None,
+    ):
+        """Starts extracting the state changes of a completed turn."""
+        with self._lock:
+            self._pending.append(
+                self._executor.submit(
+                    self._request_changes, player_state, action, narrative, usage
+                )
+            )
+        logger.debug("Scheduled background state extraction.")
+
+    @staticmethod
+    def _request_changes(
+        player_state: str,
+        action: Optional[str],
+        narrative: str,
+        usage: Optional[UsageLedger],
+    ) -> List[Tuple[str, str]]:
+        # Runs on the executor thread, so it is the root span of its own trace
+        with tracing.span("extract_state") as span:
+            changes = request_state_changes(player_state, action, narrative, usage)
+            span.set_attribute("changes", len(changes))
+            return changes
+
+    def apply_pending(self, player: Character, wait: bool = False) -> List[str]:
+        """
+        Applies the changes of finished extractions to the player, one batch per
+        turn (waiting for running ones if `wait`). Returns the tool messages to
+        show the player. Failed extractions are logged and skipped.
+        """
+        tool_messages = []
+        while True:
+            with self._lock:
+                if not self._pending or (not wait and not self._pending[0].done()):
+                    break
+                future = self._pending.pop(0)
+            try:
+                changes = future.result()
+            except TransportError as e:
+                logger.error(f"Error calling AI API for state extraction: {e}")
+                continue
+            except Exception:
+                logger.exception("Error during background state extraction.")
+                continue
+            if changes:
+                apply_tool_calls(player, changes, tool_messages)
+        return tool_messages
+
+    def cancel(self):
+        """Drops any pending extractions."""
+        with self._lock:
+            for future in self._pending:
+                future.cancel()
+            self._pending = []
+
+    def shutdown(self):
+        """Stops the background worker."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
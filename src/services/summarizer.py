@@ -0,0 +1,217 @@
+# services/summarizer.py
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from core import config, tracing
+from core.usage import SUMMARIZATION, UsageLedger
+from game.message_log import MessageLog
+from services.context_window import ContextWindow, SUMMARY_PREFIX, render_transcript
+from services.transport import TransportError, get_transport
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = "This is an RPG roleplay transcript of a User (player) and an Assistant (dungeon master). Please write most important facts in a list like this:\nUser saw a giant old building.\nThe building had a familiar graffiti.\nUser went into the building.\nThe giant rat inside the house lunged at him.\n\n---\nDon't say anything else, just list. Be very brief like the examples I showed. Don't use any symbols. List items are separated by new lines only. Here's the transcript:\n\n"
+
+MERGE_PROMPT = "These are fact lists summarizing consecutive earlier parts of an RPG roleplay, oldest first. Merge them into a single shorter list that keeps only the facts that still matter for the story (characters, places, items, unresolved threads).\n\n---\nDon't say anything else, just list. Be very brief. Don't use any symbols. List items are separated by new lines only. Here are the lists:\n\n"
+
+# Extra conversation messages included after a chunk so facts at its edge are not missed.
+SUMMARY_OVERLAP_MESSAGES = 2
+
+
+def plan_summary(
+    messages: List[Dict], context_window: ContextWindow = None
+) -> Optional[Tuple[List[Dict], str]]:
+    """
+    Decides what to summarize next. Returns the messages to replace and the
+    summarization prompt, or None if the history is within budget.
+
+    Piled-up summaries are merged first (hierarchical summary); otherwise the
+    oldest conversation messages are summarized.
+    """
+    context_window = context_window or ContextWindow()
+
+    summaries = context_window.select_summaries_to_merge(messages)
+    if summaries:
+        return summaries, MERGE_PROMPT + render_transcript(summaries)
+
+    chunk = context_window.select_messages_to_summarize(messages)
+    if not chunk:
+        return None
+    conversation = (msg for msg in messages if msg.get("role") != "system")
+    overlap = list(islice(conversation, len(chunk) + SUMMARY_OVERLAP_MESSAGES))
+    return chunk, SUMMARY_PROMPT + render_transcript(overlap)
+
+
+def request_summary(summary_prompt: str, usage: Optional[UsageLedger] = None) -> str:
+    """Asks the summarization model for a brief fact list."""
+    summary_payload = {
+        "model": config.SUMMARIZATION_MODEL,
+        "messages": [{"role": "user", "content": summary_prompt}],
+        "usage": {"include": True},
+    }
+    with tracing.span(
+        "llm.request", model=config.SUMMARIZATION_MODEL, stream=False, kind="summary"
+    ) as span:
+        summary_data = get_transport().chat_completion(summary_payload)
+        span.set_attributes(tracing.usage_attributes(summary_data.get("usage")))
+    if usage is not None:
+        usage.record(SUMMARIZATION, config.SUMMARIZATION_MODEL, summary_data.get("usage"))
+    return summary_data["choices"][0]["message"]["content"].strip()
+
+
+def _find_run(messages: List[Dict], run: List[Dict]) -> Optional[int]:
+    """
+    Returns where `run` sits as consecutive messages (matched by identity), or None.
+    Summarized runs are the oldest messages, so the search stops near the head.
+    """
+    first = next((i for i, msg in enumerate(messages) if msg is run[0]), None)
+    if first is None or len(messages) - first < len(run):
+        return None
+    if all(messages[first + j] is msg for j, msg in enumerate(run)):
+        return first
+    return None
+
+
+def splice_summary(
+    messages: List[Dict], summarized: List[Dict], summary_content: str
+) -> List[Dict]:
+    """
+    Returns a new message log with the summarized messages replaced by a single
+    summary message at the position of the first one. Messages are matched by
+    identity, so the splice stays correct if the history grew in the meantime.
+    """
+    summary = {"role": "system", "content": f"{SUMMARY_PREFIX}{summary_content}"}
+    if not isinstance(messages, MessageLog):
+        messages = MessageLog(messages)
+    start = _find_run(messages, summarized) if summarized else None
+    if start is not None:
+        # The usual case: one run of old messages, replaced by slicing
+        return messages.replace_run(start, start + len(summarized), summary)
+
+    summarized_ids = {id(msg) for msg in summarized}
+    spliced = MessageLog()
+    inserted = False
+    for msg in messages:
+        if id(msg) in summarized_ids:
+            if not inserted:
+                spliced.append(summary)
+                inserted = True
+            continue
+        spliced.append(msg)
+    if not inserted:
+        logger.warning("Summarized messages no longer in history; summary discarded.")
+        return messages
+    return spliced
+
+
+def summarize_old_messages(
+    messages: List[Dict], usage: Optional[UsageLedger] = None
+) -> List[Dict]:
+    """Summarizes old messages inline (blocking) and returns the updated list."""
+    plan = plan_summary(messages)
+    if not plan:
+        return messages
+    chunk, summary_prompt = plan
+    try:
+        with tracing.span("summarize", messages=len(chunk), background=False):
+            summary_content = request_summary(summary_prompt, usage)
+            messages = splice_summary(messages, chunk, summary_content)
+        logger.info(f"Summarized {len(chunk)} old messages using LLM.")
+    except TransportError as e:
+        logger.error(f"Error calling AI API for summarization: {e}")
+        # Continue without summarization if API call fails
+    except Exception as e:
+        logger.exception("Error during summarization.")
+        # Continue without summarization if summarization fails
+    return messages
+
+
+class BackgroundSummarizer:
+    """
+    Runs summarization off the turn's critical path.
+
+    schedule() is called after a turn completes and starts a summary request in the
+    background if the history is over its token budget. apply_pending() is called before
+    the next turn and splices a finished summary into the history; if the request
+    is still running the turn proceeds without waiting and the summary is applied
+    on a later turn.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="summarizer"
+        )
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        self._chunk: Optional[List[Dict]] = None
+
+    def schedule(
+        self, messages: List[Dict], usage: Optional[UsageLedger] = None
+    ) -> bool:
+        """Starts a background summary if one is needed and none is running."""
+        with self._lock:
+            if self._future is not None:
+                return False
+            plan = plan_summary(messages)
+            if not plan:
+                return False
+            chunk, summary_prompt = plan
+            self._chunk = chunk
+            self._future = self._executor.submit(
+                self._request_summary, summary_prompt, len(chunk), usage
+            )
+        logger.info(f"Scheduled background summary of {len(chunk)} messages.")
+        return True
+
+    @staticmethod
+    def _request_summary(
+        summary_prompt: str, chunk_size: int, usage: Optional[UsageLedger]
+    ) -> str:
+        # Runs on the executor thread, so it is the root span of its own trace
+        with tracing.span("summarize", messages=chunk_size, background=True):
+            return request_summary(summary_prompt, usage)
+
+    def apply_pending(
+        self, messages: List[Dict], wait: bool = False
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Splices a finished summary into messages. Returns the resulting list and the
+        messages the summary replaced; the list is returned unchanged (with nothing
+        replaced) if no summary is ready or the request failed.
+        """
+        with self._lock:
+            future, chunk = self._future, self._chunk
+            if future is None or (not wait and not future.done()):
+                return messages, []
+            self._future, self._chunk = None, None
+
+        try:
+            summary_content = future.result()
+        except TransportError as e:
+            logger.error(f"Error calling AI API for summarization: {e}")
+            return messages, []
+        except Exception:
+            logger.exception("Error during background summarization.")
+            return messages, []
+
+        spliced = splice_summary(messages, chunk, summary_content)
+        if spliced is messages:
+            return messages, []
+        logger.info(f"Applied background summary of {len(chunk)} messages.")
+        return spliced, chunk
+
+    def cancel(self):
+        """Drops any pending summary."""
+        with self._lock:
+            if self._future is not None:
+                self._future.cancel()
+            self._future, self._chunk = None, None
+
+    def shutdown(self):
+        """Stops the background worker."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,161 @@
+# services/transport.py
+
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from core import config, tracing
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TransportError(Exception):
+    """
+    A chat-completion request failed: connection error, timeout, error status or
+    an undecodable response. Wraps the HTTP library's exception (as __cause__), so
+    callers can catch it without importing that library.
+    """
+
+
+class NarratorTransport:
+    """
+    Shared, pooled HTTP client for chat-completion requests.
+
+    The HTTP stack (requests) is imported when the first transport is built, so
+    importing this module (e.g. for TransportError) keeps startup fast.
+    """
+
+    def __init__(
+        self,
+        api_url: str = None,
+        api_key: str = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        pool_size: int = None,
+        max_retries: int = None,
+        backoff_factor: float = None,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self._request_exception = requests.exceptions.RequestException
+        self.api_url = api_url or config.OPENROUTER_API_URL
+        self.api_key = api_key if api_key is not None else config.OPENROUTER_API_KEY
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else config.HTTP_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else config.HTTP_READ_TIMEOUT,
+        )
+
+        retry = Retry(
+            total=max_retries if max_retries is not None else config.HTTP_MAX_RETRIES,
+            backoff_factor=(
+                backoff_factor if backoff_factor is not None else config.HTTP_BACKOFF_FACTOR
+            ),
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        pool_size = pool_size or config.HTTP_POOL_SIZE
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        logger.info(
+            f"NarratorTransport initialized (pool={pool_size}, timeout={self.timeout})."
+        )
+
+    def post(self, payload: Dict, **kwargs) -> "requests.Response":
+        """
+        POSTs a JSON payload to the chat-completions endpoint and returns the raw
+        response. Raises TransportError.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        # For streams this covers the time until the response headers arrive
+        with tracing.span("http.post", stream=bool(kwargs.get("stream"))) as span:
+            try:
+                response = self.session.post(self.api_url, json=payload, **kwargs)
+                span.set_attribute("status_code", response.status_code)
+                response.raise_for_status()
+            except self._request_exception as e:
+                raise TransportError(str(e)) from e
+        return response
+
+    def chat_completion(self, payload: Dict) -> Dict:
+        """POSTs a chat-completion request and returns the decoded JSON body."""
+        response = self.post(payload)
+        try:
+            return response.json()
+        except (self._request_exception, ValueError) as e:
+            raise TransportError(f"Invalid response body: {e}") from e
+
+    def stream_chat_completion(self, payload: Dict) -> Iterator[Dict]:
+        """
+        POSTs a streaming chat-completion request and yields each decoded
+        server-sent event until the stream reports [DONE].
+        """
+        payload = dict(payload, stream=True)
+        with self.post(payload, stream=True) as response:
+            if response.encoding is None:
+                response.encoding = "utf-8"
+            for line in self._stream_lines(response):
+                # Skip event separators and ':' keep-alive comments.
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed stream event: {data!r}")
+
+    def _stream_lines(self, response: "requests.Response") -> Iterator[str]:
+        """Yields a streamed response's lines; raises TransportError if it breaks."""
+        try:
+            yield from response.iter_lines(decode_unicode=True)
+        except self._request_exception as e:
+            raise TransportError(f"Stream interrupted: {e}") from e
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
+
+
+_transport: Optional[NarratorTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> NarratorTransport:
+    """Returns the process-wide transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = NarratorTransport()
+    return _transport
+
+
+def reset_transport():
+    """Closes the shared transport so the next call rebuilds it from config."""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
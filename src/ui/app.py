@@ -0,0 +1,167 @@
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+import customtkinter as ctk
+
+from ui.menu import MainMenuGUI
+from ui.game_screen import GameScreen
+
+logger = logging.getLogger(__name__)
+
+MENU_GEOMETRY = "600x500"
+GAME_GEOMETRY = "1200x1000"
+
+
+class FrameTaleApp(ctk.CTk):
+    """
+    The application's single Tk root window.
+
+    The main menu and the game screen are frames swapped inside this window, so Tk
+    and the window are created once per run instead of once per screen.
+    """
+
+    def __init__(self, engine, on_ready: Optional[Callable[[], None]] = None):
+        super().__init__()
+
+        self.engine = engine
+        self._on_ready = on_ready
+        self._screen = None
+        # Results of background work, handed back to the main loop
+        self._results = queue.Queue()
+
+        # --- Configuration ---
+        ctk.DrawEngine.preferred_drawing_method = "circle_shapes"
+        ctk.set_appearance_mode("Dark")
+        self.title("FrameTale")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bind("<Map>", self._on_map)
+
+        self.show_menu()
+
+    # --- Screens ---
+
+    def _show(self, screen: ctk.CTkFrame, geometry: str):
+        """Replaces the current screen with `screen`."""
+        if self._screen is not None:
+            self._screen.destroy()
+        self.geometry(geometry)
+        screen.grid(row=0, column=0, sticky="nsew")
+        self._screen = screen
+
+    def show_menu(self):
+        """Shows the main menu."""
+        logger.info("Showing main menu.")
+        self._show(MainMenuGUI(self, on_choice=self.handle_choice), MENU_GEOMETRY)
+
+    def show_game(self):
+        """Shows the game screen for the engine's current game."""
+        logger.info("Showing game screen.")
+        self._show(GameScreen(self, self.engine), GAME_GEOMETRY)
+
+    def _on_map(self, event):
+        """Runs the on_ready callback once the window is first on screen."""
+        if event.widget is self and self._on_ready:
+            on_ready, self._on_ready = self._on_ready, None
+            self.after_idle(on_ready)
+
+    # --- Menu choices ---
+
+    def handle_choice(self, choice: str, slot_id: Optional[str] = None):
+        """Carries out a main menu choice."""
+        menu = self._screen
+        if choice == "1":
+            logger.info("Starting new game...")
+            menu.set_busy(True)
+            menu.set_status("🧭 Loading...")
+            self._run_in_background(self._start_new_game, self._on_new_game_started)
+        elif choice in ("2", "load"):
+            logger.info("Attempting to continue game...")
+            # "Continue" resumes the most recent slot; "load" the one picked from the list
+            if self.engine.load_game(slot_id):
+                logger.info("Loaded game state successfully.")
+                self.show_game()
+            else:
+                logger.warning(
+                    "Could not load game. No save file found or file is invalid."
+                )
+                menu.set_status("No game save available.")
+        elif choice == "4":
+            logger.info("Exiting game.")
+            self.quit_app()
+
+    def _start_new_game(self) -> bool:
+        """Starts a new game (runs off the main loop; it waits for the AI)."""
+        self.engine.start_new_game()
+        if self.engine.save_game():
+            logger.debug("Saved game state after initial narrative.")
+        else:
+            logger.warning("Failed to save initial game state.")
+        return self.engine.game_state.is_initialized()
+
+    def _on_new_game_started(self, initialized: bool, error: Optional[Exception]):
+        if initialized and not error:
+            self.show_game()
+            return
+        logger.error("Engine state not initialized after start_new_game.")
+        if isinstance(self._screen, MainMenuGUI):
+            self._screen.set_busy(False)
+            self._screen.set_status("Failed to start a new game.")
+
+    def _run_in_background(
+        self,
+        work: Callable[[], object],
+        on_done: Callable[[object, Optional[Exception]], None],
+    ):
+        """Runs `work` on a thread and calls on_done(result, error) on the main loop."""
+
+        def run():
+            try:
+                self._results.put((on_done, work(), None))
+            except Exception as e:
+                logger.exception(f"Error in background task: {e}")
+                self._results.put((on_done, None, e))
+
+        threading.Thread(target=run, name="app-task", daemon=True).start()
+        self._poll_results()
+
+    def _poll_results(self):
+        try:
+            on_done, result, error = self._results.get_nowait()
+        except queue.Empty:
+            self.after(50, self._poll_results)
+            return
+        on_done(result, error)
+
+    # --- Lifecycle ---
+
+    def on_close(self):
+        """Handles the window close ('X') button."""
+        if isinstance(self._screen, GameScreen):
+            self._screen.quit_game()  # Saves, then quits
+        else:
+            self.quit_app()
+
+    def quit_app(self):
+        """Stops the main loop and destroys the window."""
+        logger.info("Quitting application.")
+        self.quit()  # Stop the Tkinter main loop
+        self.destroy()  # Destroy the window and widgets
+
+
+def run_app(engine, on_ready: Optional[Callable[[], None]] = None) -> None:
+    """
+    Creates the root window with the main menu and runs the Tk main loop.
+
+    Args:
+        engine: The initialized GameEngine instance.
+        on_ready: Called once the window is first on screen.
+    """
+    logger.info("Initializing FrameTaleApp...")
+    app = FrameTaleApp(engine, on_ready=on_ready)
+    logger.info("Starting main loop...")
+    app.mainloop()
+    logger.info("Main loop finished.")
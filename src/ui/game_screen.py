@@ -1,119 +1,248 @@
 import logging
 import time
 import random
-import threading
 import queue
+from collections import deque
+from typing import Dict, List, Optional
 import customtkinter as ctk
 
+from core import config
+from game.turn_executor import TurnExecutor
+
 # from game.engine import GameEngine # Assuming this is your actual engine import
 
 logger = logging.getLogger(__name__)
 
 
 class NarrativeTyper:
-    """Handles the threaded typing effect for the narrative textbox."""
+    """
+    Handles the typing effect for the narrative textbox.
+
+    Runs on the Tk main loop with no extra thread: a ~60 Hz tick inserts every
+    character that is due since the last frame as one batch, using the same
+    punctuation-aware pacing per character. Text can be fed incrementally while
+    it streams in, and skip_to_end() shows everything at once.
+    """
+
+    FRAME_MS = 16  # ~60 Hz
+    MAX_LAG = 0.1  # seconds of backlog to catch up on after an idle gap
 
     def __init__(self, textbox: ctk.CTkTextbox, app: ctk.CTk):
         self.textbox = textbox
         self.app = app
-        self._stop_event = threading.Event()
-        self._thread = None
+        self._buffer = deque()
+        self._next_char_time = 0.0
+        self._tick_id = None
+        self._ended = True
+        self._skipping = False
 
     def type_out(self, text: str):
-        """Starts the typing effect in a separate thread."""
-        # Stop any existing typing thread
-        self.stop()
+        """Types out a complete text at the end of the textbox."""
+        self.begin()
+        self.feed(text)
+        self.end()
+
+    def begin(self):
+        """Starts a new narrative that will be fed in pieces, appended to the textbox."""
+        self.flush()
+        self._ended = False
+        self._skipping = False
+        self._next_char_time = time.monotonic()
 
-        # Clear the stop event for the new thread
-        self._stop_event.clear()
-
-        # Disable textbox during typing, clear it
         self.textbox.configure(state="normal")
-        self.textbox.delete("0.0", "end")
-        self.textbox.configure(state="disabled")
 
-        # Start the new typing thread
-        self._thread = threading.Thread(
-            target=self._type_worker, args=(text,), daemon=True
-        )
-        self._thread.start()
+    def feed(self, text: str):
+        """Queues more text of the current narrative for typing."""
+        if not text:
+            return
+        if self._skipping:
+            self._insert(text)
+            return
+        self._buffer.extend(text)
+        self._schedule_tick()
 
-    def _type_worker(self, text: str):
-        """The worker function that performs typing simulation."""
-        try:
-            # Re-enable textbox safely using app.after
-            self.app.after(0, lambda: self.textbox.configure(state="normal"))
-
-            for char in text:
-                # Check if stop was requested
-                if self._stop_event.is_set():
-                    logger.info("Typing thread stopped.")
-                    break
-
-                # Schedule character insertion on the main thread
-                self.app.after(0, lambda c=char: self._insert_char(c))
-
-                # Calculate delay
-                if char == "\n":
-                    delay = 0.5  # Slightly faster newline
-                elif char in [".", "!", "?"]:
-                    delay = 0.3  # Faster punctuation
-                elif char == ",":
-                    delay = 0.1
-                elif char == " ":
-                    delay = 0.01
-                else:
-                    # Variable delay for other characters
-                    delay = random.uniform(0.01, 0.05)
-
-                time.sleep(delay)
-
-            # Ensure the final state is disabled, scheduled after the last char
-            self.app.after(10, self._finalize_typing)
+    def end(self):
+        """Marks the current narrative as complete; typing finishes once the buffer drains."""
+        self._ended = True
+        self._schedule_tick()
 
-        except Exception as e:
-            logger.exception(f"Error in typing thread: {e}")
-            # Ensure textbox is disabled even if error occurs
-            self.app.after(0, lambda: self.textbox.configure(state="disabled"))
-
-    def _insert_char(self, char: str):
-        """Inserts a character and scrolls (runs on main thread via app.after)."""
-        if self.textbox.winfo_exists():  # Check if widget still exists
-            self.textbox.insert("end", char)
+    def skip_to_end(self):
+        """Shows all queued text immediately, and any text fed later without delay."""
+        if self._ended and not self._buffer:
+            return
+        self._skipping = True
+        if self._buffer:
+            self._insert("".join(self._buffer))
+            self._buffer.clear()
+        self._schedule_tick()
+
+    def flush(self):
+        """Inserts all queued text immediately, without changing the typing state."""
+        if self._buffer:
+            self._insert("".join(self._buffer))
+            self._buffer.clear()
+
+    def has_hidden_text(self) -> bool:
+        """Returns True if skip_to_end() would reveal text that is still being typed."""
+        return bool(self._buffer) or (not self._ended and not self._skipping)
+
+    def is_typing(self) -> bool:
+        """Returns True while a narrative is being typed or is still receiving text."""
+        return not self._ended or bool(self._buffer)
+
+    @staticmethod
+    def _char_delay(char: str) -> float:
+        """Returns the typing delay after a character."""
+        if char == "\n":
+            return 0.5  # Slightly faster newline
+        elif char in [".", "!", "?"]:
+            return 0.3  # Faster punctuation
+        elif char == ",":
+            return 0.1
+        elif char == " ":
+            return 0.01
+        # Variable delay for other characters
+        return random.uniform(0.01, 0.05)
+
+    def _schedule_tick(self):
+        if self._tick_id is None:
+            self._tick_id = self.app.after(self.FRAME_MS, self._tick)
+
+    def _tick(self):
+        """Inserts all characters due by now in a single batch (runs on main thread)."""
+        self._tick_id = None
+        if not self.textbox.winfo_exists():
+            return
+
+        now = time.monotonic()
+        # Don't burst through text that arrived after an idle gap
+        if self._next_char_time < now - self.MAX_LAG:
+            self._next_char_time = now
+
+        batch = []
+        while self._buffer and self._next_char_time <= now:
+            char = self._buffer.popleft()
+            batch.append(char)
+            self._next_char_time += self._char_delay(char)
+        if batch:
+            self._insert("".join(batch))
+
+        if self._buffer:
+            self._schedule_tick()
+        elif self._ended:
+            self._finalize_typing()
+
+    def _insert(self, text: str):
+        """Inserts text and scrolls to the end."""
+        if self.textbox.winfo_exists():
+            self.textbox.configure(state="normal")
+            self.textbox.insert("end", text)
             self.textbox.see("end")
 
     def _finalize_typing(self):
-        """Finalizes typing state (runs on main thread via app.after)."""
+        """Finalizes typing state."""
         if self.textbox.winfo_exists():
-            # Only disable if no stop was requested during the final delay
-            if not self._stop_event.is_set():
-                self.textbox.configure(state="disabled")
+            self.textbox.configure(state="disabled")
             logger.info("Typing finished.")
 
     def stop(self):
-        """Signals the typing thread to stop."""
-        if self._thread and self._thread.is_alive():
-            self._stop_event.set()
-            # Optionally wait for the thread to finish
-            # self._thread.join(timeout=0.1)
-            logger.info("Stop signal sent to typing thread.")
-        # Re-enable textbox immediately upon stopping if it was disabled
-        # self.app.after(0, lambda: self.textbox.configure(state="normal"))
+        """Stops typing and discards any queued text."""
+        if self._tick_id is not None:
+            self.app.after_cancel(self._tick_id)
+            self._tick_id = None
+        self._buffer.clear()
+        if not self._ended:
+            logger.info("Typing stopped.")
+        self._ended = True
+        if self.textbox.winfo_exists():
+            self.textbox.configure(state="disabled")
 
 
-class GameScreen(ctk.CTk):
-    """Main application window for the FrameTale game."""
+class TranscriptView:
+    """
+    Scrollback transcript of the story in the narrative textbox.
+
+    Each turn (the player's action and the narration that followed) is appended after
+    the previous ones instead of replacing them. Only the last `max_turns` turns are
+    kept in the widget: every turn starts at a Tk text mark, and once there are too
+    many, the oldest turn is deleted up to the next mark, so a long session doesn't
+    grow the text widget without bound.
+    """
 
-    def __init__(self, engine):  # Use GameEngine
-        super().__init__()
+    TURN_SEPARATOR = "\n\n"
 
-        self.engine = engine
+    def __init__(self, textbox: ctk.CTkTextbox, typer: NarrativeTyper, max_turns: int):
+        self.textbox = textbox
+        self.typer = typer
+        self.max_turns = max(1, max_turns)
+        self._turn_marks = deque()
+        self._next_mark_id = 0
+
+    def load(self, entries: List[Dict], animate_last: bool = True):
+        """Replaces the transcript with the given turns ({"action", "narrative"})."""
+        self.clear()
+        entries = entries[-self.max_turns :]
+        for i, entry in enumerate(entries):
+            animate = animate_last and i == len(entries) - 1
+            self.add_turn(entry.get("action"), entry.get("narrative", ""), animate)
+
+    def add_turn(self, action: Optional[str], narrative: str, animate: bool = True):
+        """Appends a complete turn, typing the narrative out or showing it at once."""
+        self.start_turn(action)
+        self.typer.feed(narrative)
+        if not animate:
+            self.typer.skip_to_end()
+        self.typer.end()
+
+    def start_turn(self, action: Optional[str] = None):
+        """
+        Starts a new turn at the end of the transcript; its narrative is then fed
+        to the typer.
+        """
+        # Text still being typed belongs to the previous turn
+        self.typer.flush()
+        self.textbox.configure(state="normal")
+        if self._turn_marks:
+            self.textbox.insert("end", self.TURN_SEPARATOR)
+
+        mark = f"turn{self._next_mark_id}"
+        self._next_mark_id += 1
+        self.textbox.mark_set(mark, "end-1c")
+        # Left gravity keeps the mark before the text inserted after it
+        self.textbox.mark_gravity(mark, "left")
+        self._turn_marks.append(mark)
+
+        if action:
+            self.textbox.insert("end", f"> {action}\n\n")
+        self._trim()
+        self.typer.begin()
+
+    def clear(self):
+        """Removes all turns from the transcript."""
+        self.typer.stop()
+        for mark in self._turn_marks:
+            self.textbox.mark_unset(mark)
+        self._turn_marks.clear()
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.configure(state="disabled")
 
-        # --- Configuration ---
-        ctk.DrawEngine.preferred_drawing_method = "circle_shapes"
-        ctk.set_appearance_mode("Dark")
-        self.title("FrameTale")
-        self.geometry("1200x1000")  # Adjust size as needed
+    def _trim(self):
+        """Deletes the oldest turns beyond max_turns."""
+        while len(self._turn_marks) > self.max_turns:
+            oldest = self._turn_marks.popleft()
+            self.textbox.delete("1.0", self._turn_marks[0])
+            self.textbox.mark_unset(oldest)
+
+
+class GameScreen(ctk.CTkFrame):
+    """Main game screen for the FrameTale game, shown inside the app's root window."""
+
+    def __init__(self, master, engine):  # Use GameEngine
+        super().__init__(master, fg_color="transparent")
+
+        self.app = master
+        self.engine = engine
 
         # Consistent border thickness
         self.border_thickness = 3
@@ -139,20 +268,36 @@ class GameScreen(ctk.CTk):
 
         # --- Narrative Typer ---
         self.narrative_typer = NarrativeTyper(self.narrative_textbox, self)
+        self.transcript = TranscriptView(
+            self.narrative_textbox, self.narrative_typer, config.TRANSCRIPT_MAX_TURNS
+        )
+        # Clicking the narrative skips the typing animation
+        self.narrative_textbox.bind(
+            "<Button-1>", lambda event: self.narrative_typer.skip_to_end()
+        )
+
+        # --- Turn Executor (keeps AI calls off the Tk main loop) ---
+        # Worker callbacks are queued and drained by the main loop, never run off-thread.
+        self._ui_calls = queue.Queue()
+        self.turn_executor = TurnExecutor(
+            self.engine,
+            dispatch=self._ui_calls.put,
+            on_busy_changed=self._set_busy,
+            on_state_changed=self._show_state_changes,
+        )
+        self._drain_ui_calls()
 
         # --- Initial State Update ---
         self.update_player_status()  # Update status immediately
-        # Start initial narrative typing
-        initial_narrative = self.engine.get_last_message_content()
-        if initial_narrative:
-            self.narrative_typer.type_out(initial_narrative)
+        # Rebuild the transcript from the history, typing out the latest turn
+        entries = self.engine.get_transcript(config.TRANSCRIPT_MAX_TURNS)
+        if entries:
+            self.transcript.load(entries)
         else:
-            self.narrative_typer.type_out("Welcome! Your story awaits...")
+            self.transcript.add_turn(None, "Welcome! Your story awaits...")
 
-        # --- Bind Close Event ---
-        self.protocol(
-            "WM_DELETE_WINDOW", self.quit_game
-        )  # Handle window close ('X') button
+        # --- Bind Keys (the window close button is routed here by the app) ---
+        self.app.bind("<Escape>", self.cancel_turn_event)
 
     # --- UI Creation Methods ---
 
@@ -176,6 +321,15 @@ class GameScreen(ctk.CTk):
         )
         header_label.grid(row=0, column=0, padx=30, pady=20)
 
+        # Busy indicator, shown while a turn is running or queued
+        self.busy_label = ctk.CTkLabel(
+            header_panel,
+            text="",
+            font=ctk.CTkFont(size=self.font_size_normal),
+            anchor="e",
+        )
+        self.busy_label.grid(row=0, column=1, padx=30, pady=20, sticky="e")
+
     def _create_status_panels(self):
         """Creates the container for player status indicators."""
         self.status_container = ctk.CTkFrame(
@@ -194,6 +348,7 @@ class GameScreen(ctk.CTk):
         self.status_container.grid_columnconfigure(1, weight=0)  # Health
         self.status_container.grid_columnconfigure(2, weight=0)  # Stamina
         self.status_container.grid_columnconfigure(3, weight=0)  # Money
+        self.status_container.grid_columnconfigure(4, weight=0)  # Token usage
 
         # Create individual status labels/panels (using Labels for simplicity here)
         # You could make these CTkFrames if you want borders around each stat
@@ -242,6 +397,22 @@ class GameScreen(ctk.CTk):
         self.status_labels["money"].grid(
             row=0,
             column=3,
+            padx=label_padx,
+            pady=label_pady,
+            sticky="e",
+        )
+
+        # Session token usage and estimated cost (aligned right, dimmed)
+        self.status_labels["usage"] = ctk.CTkLabel(
+            self.status_container,
+            text="Tokens: -",
+            font=ctk.CTkFont(size=self.font_size_normal - 2),
+            text_color="gray60",
+            anchor="e",
+        )
+        self.status_labels["usage"].grid(
+            row=0,
+            column=4,
             padx=(label_padx, label_padx * 2),
             pady=label_pady,
             sticky="e",
@@ -370,39 +541,74 @@ class GameScreen(ctk.CTk):
             return
 
         logger.info(f"Player action received: '{action}'")
-        # Stop any ongoing narrative typing before processing new action
-        self.narrative_typer.stop()
 
         # Clear the entry immediately
         self.action_entry.delete(0, "end")
 
-        try:
-            # Process the action through the game engine
-            # This call might take time if the engine involves API calls etc.
-            # Consider running this in a thread if it blocks the GUI significantly
-            narrative, _ = self.engine.process_player_action(action)
-
-            # Update player status immediately
+        # The turn runs on the executor's worker thread; chunks are typed as they arrive.
+        # Actions sent while a turn is in flight are queued behind it.
+        def on_complete(turn):
+            if not turn.started:
+                # Cancelled while still queued; nothing of it was shown
+                return
+            if turn.error:
+                self.narrative_typer.feed(
+                    f"\n⚠️ An error occurred: {turn.error}\nPlease try a different action."
+                )
+            elif turn.cancelled:
+                self.narrative_typer.feed(
+                    "\n[italic dim]>> Turn cancelled.[/italic dim]\n"
+                )
+            self.narrative_typer.end()
             self.update_player_status()
 
-            # Start typing out the new narrative
-            self.narrative_typer.type_out(
-                narrative or "..."
-            )  # Use "..." if narrative is empty
-
-            # Note: Auto-saving now happens only on quit
+        self.turn_executor.submit(
+            action,
+            on_start=lambda turn: self.transcript.start_turn(turn.action),
+            on_chunk=self.narrative_typer.feed,
+            on_complete=on_complete,
+        )
 
-        except Exception as e:
-            logger.exception(f"Error processing action: {e}")
-            # Display error message directly (no typing effect for errors)
-            self.narrative_textbox.configure(state="normal")
-            self.narrative_textbox.delete("0.0", "end")
-            self.narrative_textbox.insert(
-                "0.0", f"⚠️ An error occurred: {e}\nPlease try a different action."
-            )
-            self.narrative_textbox.configure(state="disabled")
-            # Still update status in case of partial success or relevant error state
-            self.update_player_status()
+    def _show_state_changes(self, messages: List[str]):
+        """Appends state changes applied after the turn (split pipeline) and refreshes the status."""
+        self.narrative_typer.feed("\n" + "".join(messages))
+        self.narrative_typer.end()
+        self.update_player_status()
+
+    def cancel_turn_event(self, event=None):
+        """
+        Bound to the Escape key: the first press reveals the text still being typed
+        out; once nothing is left to reveal, the next press cancels the in-flight turn.
+        """
+        if self.narrative_typer.has_hidden_text():
+            self.narrative_typer.skip_to_end()
+        else:
+            self.turn_executor.cancel_current()
+
+    def _drain_ui_calls(self):
+        """Runs callbacks queued by the turn executor (main thread, ~60 Hz)."""
+        while True:
+            try:
+                callback = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(f"Error in turn callback: {e}")
+        if self.winfo_exists():
+            self.after(16, self._drain_ui_calls)
+
+    def _set_busy(self, busy: bool, pending: int):
+        """Shows or hides the busy indicator in the header."""
+        if not self.busy_label.winfo_exists():
+            return
+        if not busy:
+            self.busy_label.configure(text="")
+        elif pending > 1:
+            self.busy_label.configure(text=f"Thinking... ({pending - 1} queued)")
+        else:
+            self.busy_label.configure(text="Thinking...")
 
     def handle_special_action(self):
         """Placeholder for the 'Special' button action."""
@@ -418,7 +624,7 @@ class GameScreen(ctk.CTk):
         # self.update_player_status() # Example if stats change
 
         # Start typing out the message
-        self.narrative_typer.type_out(special_message)
+        self.transcript.add_turn(None, special_message)
 
         # Optionally clear the input field or add specific text
         # self.action_entry.delete(0, "end")
@@ -476,6 +682,14 @@ class GameScreen(ctk.CTk):
                         else "Money: Error"
                     )
                 )
+            if (
+                "usage" in self.status_labels
+                and self.status_labels["usage"].winfo_exists()
+            ):
+                usage = self.engine.get_usage()["total"]
+                self.status_labels["usage"].configure(
+                    text=f"Tokens: {usage['total_tokens']:,} (~${usage['cost']:.4f})"
+                )
 
         except Exception as e:
             logger.exception(f"Error updating player status display: {e}")
@@ -502,30 +716,13 @@ class GameScreen(ctk.CTk):
             logger.exception(f"Error saving game on quit: {e}")
         finally:
             # Ensure the application quits regardless of save success/failure
-            logger.info("Quitting application.")
-            self.quit()  # Stop the Tkinter main loop
-            self.destroy()  # Destroy the window and widgets
+            self.app.quit_app()
 
     def quit_game(self):
         """Handles the quit action, triggering save_and_quit."""
-        # Stop any background tasks like typing
+        # Stop any background tasks like typing and in-flight turns
         self.narrative_typer.stop()
+        self.turn_executor.shutdown()
         # Proceed with saving and quitting
         self.save_and_quit()
 
-
-def run_game_loop(
-    engine,
-) -> None:  # Use GameEngine
-    """
-    Initializes and runs the game loop using the CustomTkinter GUI.
-
-    Args:
-        engine: The initialized GameEngine instance.
-    """
-
-    logger.info("Initializing GameScreen...")
-    app = GameScreen(engine)
-    logger.info("Starting main loop...")
-    app.mainloop()
-    logger.info("Main loop finished.")
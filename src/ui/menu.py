@@ -1,22 +1,24 @@
 import logging
 import sys
+import time
+from typing import Callable, Optional
 import customtkinter as ctk
 
+from game import persistence
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-class MainMenuGUI(ctk.CTk):
-    """Main menu window for the FrameTale game."""
-
-    def __init__(self):
-        super().__init__()
+class MainMenuGUI(ctk.CTkFrame):
+    """
+    Main menu screen for the FrameTale game, shown inside the app's root window.
+    The player's choice is passed to `on_choice(choice, slot_id)`.
+    """
 
-        # --- Configuration ---
-        ctk.DrawEngine.preferred_drawing_method = "circle_shapes"
-        ctk.set_appearance_mode("Dark")
-        self.title("FrameTale")
-        self.geometry("600x500")  # Larger window
+    def __init__(self, master, on_choice: Callable[[str, Optional[str]], None]):
+        super().__init__(master, fg_color="transparent")
+        self.on_choice = on_choice
 
         # Consistent styling from previous GameScreen
         self.border_thickness = 3
@@ -32,11 +34,9 @@ class MainMenuGUI(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)  # Main panel takes full weight
 
         # --- Create Panels ---
+        self.menu_buttons = []
         self._create_main_panel()
 
-        # Tracking user choice
-        self.choice = None
-
     def _create_main_panel(self):
         """Creates the main menu panel with game options."""
         main_panel = ctk.CTkFrame(
@@ -45,10 +45,11 @@ class MainMenuGUI(ctk.CTk):
             border_width=self.border_thickness,
         )
         main_panel.grid(row=0, column=0, padx=30, pady=30, sticky="nsew")
+        self.main_panel = main_panel
 
         # Configure panel grid
         main_panel.grid_columnconfigure(0, weight=1)
-        main_panel.grid_rowconfigure((0, 1, 2, 3, 4), weight=1)
+        main_panel.grid_rowconfigure((0, 1, 2, 3, 4, 5, 6), weight=1)
 
         # Title Label
         title_label = ctk.CTkLabel(
@@ -87,6 +88,19 @@ class MainMenuGUI(ctk.CTk):
         )
         continue_game_button.grid(row=2, column=0, padx=20, pady=10)
 
+        # Load Game Button
+        load_game_button = ctk.CTkButton(
+            main_panel,
+            text="Load Game",
+            command=self.open_load_panel,
+            width=self.button_width,
+            height=self.button_height,
+            corner_radius=self.widget_corner_radius,
+            border_width=self.border_thickness,
+            font=button_font,
+        )
+        load_game_button.grid(row=3, column=0, padx=20, pady=10)
+
         # Settings Button
         settings_button = ctk.CTkButton(
             main_panel,
@@ -98,7 +112,7 @@ class MainMenuGUI(ctk.CTk):
             border_width=self.border_thickness,
             font=button_font,
         )
-        settings_button.grid(row=3, column=0, padx=20, pady=10)
+        settings_button.grid(row=4, column=0, padx=20, pady=10)
 
         # Exit Button inside the main panel
         exit_button = ctk.CTkButton(
@@ -113,37 +127,133 @@ class MainMenuGUI(ctk.CTk):
             fg_color=("#E74C3C", "#C0392B"),
             hover_color=("#C0392B", "#A93226"),
         )
-        exit_button.grid(row=4, column=0, padx=20, pady=20, sticky="se")
+        exit_button.grid(row=5, column=0, padx=20, pady=20, sticky="se")
+
+        # Status line, e.g. while a new game is loading
+        self.status_label = ctk.CTkLabel(
+            main_panel, text="", font=ctk.CTkFont(size=self.font_size_normal - 2)
+        )
+        self.status_label.grid(row=6, column=0, padx=20, pady=(0, 10))
+
+        self.menu_buttons = [
+            new_game_button,
+            continue_game_button,
+            load_game_button,
+            settings_button,
+        ]
+
+    def _create_load_panel(self):
+        """Creates the save slot list. Entries come from the save catalog only."""
+        load_panel = ctk.CTkFrame(
+            self,
+            corner_radius=self.panel_corner_radius,
+            border_width=self.border_thickness,
+        )
+        load_panel.grid_columnconfigure(0, weight=1)
+        load_panel.grid_rowconfigure(1, weight=1)
+
+        title_label = ctk.CTkLabel(
+            load_panel,
+            text="Load Game",
+            font=ctk.CTkFont(size=self.font_size_large, weight="bold"),
+        )
+        title_label.grid(row=0, column=0, padx=20, pady=20)
+
+        slot_list = ctk.CTkScrollableFrame(
+            load_panel, corner_radius=self.widget_corner_radius
+        )
+        slot_list.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        slot_list.grid_columnconfigure(0, weight=1)
+
+        slots = persistence.list_save_slots()
+        if not slots:
+            ctk.CTkLabel(
+                slot_list,
+                text="No saved games.",
+                font=ctk.CTkFont(size=self.font_size_normal),
+            ).grid(row=0, column=0, padx=10, pady=10)
+
+        for row, slot in enumerate(slots):
+            saved_at = time.strftime(
+                "%Y-%m-%d %H:%M", time.localtime(slot["timestamp"])
+            )
+            slot_button = ctk.CTkButton(
+                slot_list,
+                text=(
+                    f"{slot['player_name']}  ·  turn {slot['turn_count']}  ·  "
+                    f"{saved_at}  ·  {slot['size'] // 1024} KB"
+                ),
+                command=lambda slot_id=slot["slot_id"]: self.load_slot(slot_id),
+                height=40,
+                corner_radius=self.widget_corner_radius,
+                font=ctk.CTkFont(size=self.font_size_normal - 2),
+                anchor="w",
+            )
+            slot_button.grid(row=row, column=0, padx=10, pady=5, sticky="ew")
+
+        back_button = ctk.CTkButton(
+            load_panel,
+            text="Back",
+            command=self.close_load_panel,
+            height=40,
+            width=80,
+            corner_radius=self.widget_corner_radius,
+            border_width=self.border_thickness,
+            font=ctk.CTkFont(size=self.font_size_normal - 2),
+        )
+        back_button.grid(row=2, column=0, padx=20, pady=20, sticky="se")
+        return load_panel
+
+    # --- State ---
+
+    def set_status(self, text: str):
+        """Shows a status message under the menu buttons."""
+        if self.status_label.winfo_exists():
+            self.status_label.configure(text=text)
+
+    def set_busy(self, busy: bool):
+        """Disables the menu buttons while a choice is being carried out."""
+        for button in self.menu_buttons:
+            if button.winfo_exists():
+                button.configure(state="disabled" if busy else "normal")
 
     # --- Menu Action Handlers ---
 
     def new_game(self):
         """Handle new game selection."""
         logger.info("New Game selected")
-        self.choice = "1"
-        self.destroy()
+        self.on_choice("1", None)
 
     def continue_game(self):
         """Handle continue game selection."""
         logger.info("Continue Game selected")
-        self.choice = "2"
-        self.destroy()
+        self.on_choice("2", None)
+
+    def open_load_panel(self):
+        """Shows the save slot list in place of the main menu."""
+        logger.info("Load Game selected")
+        self.main_panel.grid_remove()
+        self.load_panel = self._create_load_panel()
+        self.load_panel.grid(row=0, column=0, padx=30, pady=30, sticky="nsew")
+
+    def close_load_panel(self):
+        """Returns from the save slot list to the main menu."""
+        self.load_panel.destroy()
+        self.main_panel.grid()
+
+    def load_slot(self, slot_id: str):
+        """Handle choosing a save slot."""
+        logger.info(f"Save slot selected: {slot_id}")
+        self.close_load_panel()
+        self.on_choice("load", slot_id)
 
     def open_settings(self):
         """Placeholder for settings menu."""
         logger.info("Settings selected")
-        self.choice = "3"
         # TODO: Implement settings menu
-        # For now, it just logs and closes
+        # For now, it just logs
 
     def exit_game(self):
         """Handle game exit."""
         logger.info("Exit selected")
-        self.choice = "4"
-        self.destroy()
-
-    def get_choice(self):
-        """Run the main loop and return user's choice."""
-        logger.info("Entering main menu loop")
-        self.mainloop()
-        return self.choice
+        self.on_choice("4", None)